@@ -2,16 +2,16 @@
 Audit Report API Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Header, Response
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import uuid
 
 from app.db import get_db
 from app.models import AuditReport, PowerLog, TaskStatus
-from app.schemas import AuditReportRequest, AuditReportResponse
-from app.services import llm_service
+from app.schemas import AuditReportRequest, AuditReportResponse, TaskStatusResponse
+from app.services import llm_service, task_service
 from loguru import logger
 
 router = APIRouter()
@@ -199,6 +199,38 @@ async def generate_audit_report(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/generate/{task_id}", response_model=TaskStatusResponse)
+async def get_report_generation_status(
+    task_id: str,
+    response: Response,
+    wait: float = Query(0.0, ge=0.0, le=60.0, description="長輪詢：最長等待任務結束的秒數"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """查詢報告生成任務狀態（wait > 0 時為長輪詢，任務結束即回應）"""
+    task = await task_service.wait_for_task(db, task_id, wait)
+    
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    # 狀態未變時回傳 304（無 body），client 不必重新解析 JSON
+    etag = task_service.task_etag(task)
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    return TaskStatusResponse(
+        task_id=task.task_id,
+        task_type=task.task_type,
+        status=task.status,
+        progress=task.progress,
+        result=task.result_json,
+        error_message=task.error_message,
+        created_at=task.created_at,
+        completed_at=task.completed_at
+    )
+
+
 @router.get("/report/{report_id}", response_model=AuditReportResponse)
 async def get_audit_report(report_id: int, db: Session = Depends(get_db)):
     """
@@ -9,7 +9,13 @@ from typing import Dict, Any
 
 from app.db import get_db
 from app.models import PowerLog
-from app.schemas import DashboardSummary, ChartDataRequest, ChartDataResponse
+from app.schemas import (
+    DashboardSummary,
+    ChartDataRequest,
+    ChartDataResponse,
+    DashboardBatchRequest,
+    DashboardBatchResponse
+)
 from loguru import logger
 
 router = APIRouter()
@@ -125,3 +131,36 @@ async def get_chart_data(
     except Exception as e:
         logger.error(f"Failed to get chart data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch", response_model=DashboardBatchResponse)
+async def get_dashboard_batch(
+    request: DashboardBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    批次查詢 Dashboard 數據（摘要與圖表一次往返取得）
+    
+    Args:
+        request: 子查詢列表，例如 ["summary", "chart:24"]
+        
+    Returns:
+        DashboardBatchResponse: 各子查詢的結果（與 /summary、/chart-data 相同格式）
+    """
+    response = DashboardBatchResponse()
+    
+    for query in request.queries:
+        name, _, arg = query.partition(":")
+        
+        if name == "summary":
+            response.summary = await get_dashboard_summary(db)
+        elif name == "chart":
+            try:
+                hours = int(arg) if arg else 24
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid chart hours: {arg}")
+            response.chart = await get_chart_data(ChartDataRequest(hours=hours), db)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown dashboard query: {query}")
+    
+    return response
@@ -2,16 +2,16 @@
 Forecast API Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Header, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import uuid
 
 from app.db import get_db
 from app.models import ForecastResult, TaskStatus
 from app.schemas import ForecastRequest, ForecastResponse, ForecastDataPoint, TaskStatusResponse
-from app.services import ai_service
+from app.services import ai_service, task_service
 from loguru import logger
 
 router = APIRouter()
@@ -180,21 +180,35 @@ async def train_models(
 
 
 @router.get("/predict/{task_id}", response_model=TaskStatusResponse)
-async def get_forecast_status(task_id: str, db: Session = Depends(get_db)):
+async def get_forecast_status(
+    task_id: str,
+    response: Response,
+    wait: float = Query(0.0, ge=0.0, le=60.0, description="長輪詢：最長等待任務結束的秒數"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
     查詢預測任務狀態
     
     Args:
         task_id: 任務 ID
+        wait: 長輪詢等待秒數，任務完成/失敗時立即回應（0 表示立即回傳）
+        if_none_match: 上次回應的 ETag，狀態未變時回傳 304
         
     Returns:
         TaskStatusResponse: 任務狀態
     """
-    task = db.query(TaskStatus).filter(TaskStatus.task_id == task_id).first()
+    task = await task_service.wait_for_task(db, task_id, wait)
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    # 狀態未變時回傳 304（無 body），client 不必重新解析 JSON
+    etag = task_service.task_etag(task)
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
     return TaskStatusResponse(
         task_id=task.task_id,
         task_type=task.task_type,
@@ -2,10 +2,10 @@
 Optimization API Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Header, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import uuid
 import json
 
@@ -17,7 +17,7 @@ from app.schemas import (
     OptimizationSchedulePoint,
     TaskStatusResponse
 )
-from app.services import optimization_service, ai_service
+from app.services import optimization_service, ai_service, task_service
 from loguru import logger
 
 router = APIRouter()
@@ -210,13 +210,25 @@ async def create_optimization(
 
 
 @router.get("/optimize/{task_id}", response_model=TaskStatusResponse)
-async def get_optimization_status(task_id: str, db: Session = Depends(get_db)):
-    """查詢優化任務狀態"""
-    task = db.query(TaskStatus).filter(TaskStatus.task_id == task_id).first()
+async def get_optimization_status(
+    task_id: str,
+    response: Response,
+    wait: float = Query(0.0, ge=0.0, le=60.0, description="長輪詢：最長等待任務結束的秒數"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """查詢優化任務狀態（wait > 0 時為長輪詢，任務結束即回應）"""
+    task = await task_service.wait_for_task(db, task_id, wait)
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    # 狀態未變時回傳 304（無 body），client 不必重新解析 JSON
+    etag = task_service.task_etag(task)
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
     from app.schemas import TaskStatusResponse
     return TaskStatusResponse(
         task_id=task.task_id,
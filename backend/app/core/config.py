@@ -17,6 +17,9 @@ class Settings(BaseSettings):
     # API
     API_V1_PREFIX: str = "/api/v1"
     
+    # Server（設定 UDS_PATH 時改為監聽 UNIX domain socket，供本機測試略過 TCP）
+    UDS_PATH: Optional[str] = None
+    
     # CORS
     CORS_ORIGINS: list = ["http://localhost:5173", "http://localhost:3000"]
     
@@ -10,7 +10,9 @@ from .power import (
     AuditReportResponse,
     TaskStatusResponse,
     ChartDataRequest,
-    ChartDataResponse
+    ChartDataResponse,
+    DashboardBatchRequest,
+    DashboardBatchResponse
 )
 
 __all__ = [
@@ -25,5 +27,7 @@ __all__ = [
     "AuditReportResponse",
     "TaskStatusResponse",
     "ChartDataRequest",
-    "ChartDataResponse"
+    "ChartDataResponse",
+    "DashboardBatchRequest",
+    "DashboardBatchResponse"
 ]
@@ -222,3 +222,17 @@ class ChartDataResponse(BaseModel):
                 }
             }
         }
+
+
+class DashboardBatchRequest(BaseModel):
+    """Dashboard 批次查詢請求（一次往返取得多項資料）"""
+    queries: List[str] = Field(
+        default_factory=lambda: ["summary", "chart:24"],
+        description="子查詢：summary、chart 或 chart:<最近 N 小時>"
+    )
+
+
+class DashboardBatchResponse(BaseModel):
+    """Dashboard 批次查詢回應（只包含有查詢的項目）"""
+    summary: Optional[DashboardSummary] = None
+    chart: Optional[ChartDataResponse] = None
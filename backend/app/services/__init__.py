@@ -1,6 +1,7 @@
 from .ai_service import ai_service, AIService
 from .optimization_service import optimization_service, OptimizationService
 from .llm_service import llm_service, LLMService
+from .task_service import task_service, TaskService
 
 __all__ = [
     "ai_service",
@@ -8,5 +9,7 @@ __all__ = [
     "optimization_service",
     "OptimizationService",
     "llm_service",
-    "LLMService"
+    "LLMService",
+    "task_service",
+    "TaskService"
 ]
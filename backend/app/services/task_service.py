@@ -0,0 +1,68 @@
+"""
+Task Service - 背景任務狀態查詢（支援長輪詢）
+"""
+
+import asyncio
+import time
+from typing import Optional
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.models import TaskStatus
+
+
+class TaskService:
+    """背景任務狀態服務"""
+    
+    # 任務結束狀態
+    TERMINAL_STATUSES = ("completed", "failed")
+    
+    def __init__(self, poll_interval: float = 0.2):
+        # 長輪詢時伺服器端重新讀取任務狀態的間隔（秒）
+        self.poll_interval = poll_interval
+    
+    async def wait_for_task(
+        self,
+        db: Session,
+        task_id: str,
+        wait: float = 0.0
+    ) -> Optional[TaskStatus]:
+        """
+        查詢任務狀態；wait > 0 時為長輪詢
+        
+        伺服器保留連線直到任務完成/失敗或 wait 秒到期才回應，
+        client 端不需要 sleep 輪詢，任務結束後即可取得結果
+        
+        Args:
+            db: 資料庫 session
+            task_id: 任務 ID
+            wait: 最長等待秒數（0 表示立即回傳目前狀態）
+        
+        Returns:
+            TaskStatus，找不到任務時為 None
+        """
+        task = db.query(TaskStatus).filter(TaskStatus.task_id == task_id).first()
+        if task is None or wait <= 0:
+            return task
+        
+        deadline = time.monotonic() + wait
+        while task.status not in self.TERMINAL_STATUSES and time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            # 背景任務以獨立 session 更新狀態，需重新讀取
+            db.refresh(task)
+        
+        logger.debug(f"Task {task_id} long-poll returned with status {task.status}")
+        return task
+    
+    @staticmethod
+    def task_etag(task: TaskStatus) -> str:
+        """
+        以 (status, progress) 計算任務狀態的弱 ETag
+        
+        進度取到 0.1%，狀態與進度都未變時 client 可憑 If-None-Match 收到 304
+        """
+        return f'W/"{task.status}-{int((task.progress or 0.0) * 10)}"'
+
+
+# Global instance
+task_service = TaskService()
@@ -80,9 +80,16 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.DEBUG
-    )
+    if settings.UDS_PATH:
+        uvicorn.run(
+            "main:app",
+            uds=settings.UDS_PATH,
+            reload=settings.DEBUG
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=settings.DEBUG
+        )
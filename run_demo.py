@@ -39,7 +39,7 @@ def run_demo():
     print(f"  - CUDA 可用: {device_info['cuda_available']}")
     if device_info['cuda_available']:
         print(f"  - GPU: {device_info['device_name']}")
-        print(f"  - GPU 記憶體: {device_info['memory_total']}")
+        print(f"  - GPU 記憶體: {device_info['memory_total'] / 1024**3:.2f} GB")
     
     # Step 3: ETL 流程
     print("\n[Step 3] 執行 ETL 資料管道...")
@@ -80,6 +80,8 @@ class Settings(BaseSettings):
     battery_efficiency: float = Field(default=0.9, env="BATTERY_EFFICIENCY")
     min_soc: float = Field(default=0.1, env="MIN_SOC")  # 最小電池狀態 10%
     max_soc: float = Field(default=0.9, env="MAX_SOC")  # 最大電池狀態 90%
+    optimization_mip_rel_gap: float = Field(default=0.01, env="OPTIMIZATION_MIP_REL_GAP")  # MIP 相對間隙 1%
+    optimization_time_limit: float = Field(default=10.0, env="OPTIMIZATION_TIME_LIMIT")  # 求解時間上限 (秒)
     
     # Taiwan TOU Tariff Configuration (台電時間電價 - 2024)
     # 夏季 (6-9月)
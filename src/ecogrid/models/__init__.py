@@ -1,9 +1,21 @@
 """AI Prediction Models Package"""
 
-from ecogrid.models.base_model import BasePredictor
-from ecogrid.models.load_forecaster import LoadForecaster
-from ecogrid.models.renewable_forecaster import RenewableForecaster
-from ecogrid.models.hybrid_engine import HybridPredictiveEngine
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ecogrid.models.base_model import BasePredictor
+    from ecogrid.models.load_forecaster import LoadForecaster
+    from ecogrid.models.renewable_forecaster import RenewableForecaster
+    from ecogrid.models.hybrid_engine import HybridPredictiveEngine
+
+# 延遲匯入：預測器模組會載入 torch，只在實際使用時才匯入
+_LAZY_IMPORTS = {
+    "BasePredictor": "ecogrid.models.base_model",
+    "LoadForecaster": "ecogrid.models.load_forecaster",
+    "RenewableForecaster": "ecogrid.models.renewable_forecaster",
+    "HybridPredictiveEngine": "ecogrid.models.hybrid_engine",
+}
 
 __all__ = [
     "BasePredictor",
@@ -11,3 +23,9 @@ __all__ = [
     "RenewableForecaster",
     "HybridPredictiveEngine"
 ]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        return getattr(import_module(_LAZY_IMPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
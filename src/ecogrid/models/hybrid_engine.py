@@ -3,8 +3,10 @@ Hybrid Predictive Engine - 混合預測引擎
 整合負載預測和再生能源預測，實作滾動式預測
 """
 
-from typing import Dict, Any, Optional, List, Tuple
-from datetime import datetime, timedelta
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, TYPE_CHECKING
+from datetime import datetime
 from pathlib import Path
 
 import numpy as np
@@ -12,9 +14,18 @@ import pandas as pd
 from loguru import logger
 
 from ecogrid.config.settings import settings
-from ecogrid.models.load_forecaster import LoadForecaster
-from ecogrid.models.renewable_forecaster import RenewableForecaster
 
+if TYPE_CHECKING:
+    # 預測器模組會載入 torch，僅在實際使用時才延遲匯入
+    from ecogrid.models.load_forecaster import LoadForecaster
+    from ecogrid.models.renewable_forecaster import RenewableForecaster
+
+
+# 非特徵欄位 (時間戳記、目標變數與衍生目標)
+_EXCLUDE_COLS = frozenset({
+    'timestamp', 'load_mw', 'solar_mw', 'wind_mw', 'tou_period',
+    'total_renewable_mw', 'hydro_mw'
+})
 
 class HybridPredictiveEngine:
     """
@@ -27,16 +38,33 @@ class HybridPredictiveEngine:
     """
     
     def __init__(self):
-        self.load_forecaster = LoadForecaster()
-        self.renewable_forecaster = RenewableForecaster()
+        self._load_forecaster: Optional['LoadForecaster'] = None
+        self._renewable_forecaster: Optional['RenewableForecaster'] = None
         self.is_fitted = False
         self.last_prediction_time: Optional[datetime] = None
         self.prediction_cache: Dict[str, Any] = {}
+        self._zero_cache: Dict[int, np.ndarray] = {}
         
         logger.info("HybridPredictiveEngine initialized")
     
+    @property
+    def load_forecaster(self) -> 'LoadForecaster':
+        """負載預測器 (首次存取時才匯入並建立)"""
+        if self._load_forecaster is None:
+            from ecogrid.models.load_forecaster import LoadForecaster
+            self._load_forecaster = LoadForecaster()
+        return self._load_forecaster
+    
+    @property
+    def renewable_forecaster(self) -> 'RenewableForecaster':
+        """再生能源預測器 (首次存取時才匯入並建立)"""
+        if self._renewable_forecaster is None:
+            from ecogrid.models.renewable_forecaster import RenewableForecaster
+            self._renewable_forecaster = RenewableForecaster()
+        return self._renewable_forecaster
+    
     def fit(self, df: pd.DataFrame, use_transformer: bool = True, 
-            use_lstm: bool = True, **kwargs):
+            use_lstm: bool = True, parallel_fit: bool = True, **kwargs):
         """
         訓練所有預測模型
         
@@ -44,6 +72,7 @@ class HybridPredictiveEngine:
             df: 包含所有特徵和目標的 DataFrame
             use_transformer: 是否使用 Transformer
             use_lstm: 是否使用 LSTM
+            parallel_fit: 是否並行訓練負載與再生能源的樹模型 (神經網路一律依序訓練)
             **kwargs: 額外訓練參數
         """
         logger.info("=" * 50)
@@ -51,30 +80,58 @@ class HybridPredictiveEngine:
         logger.info("=" * 50)
         
         # 準備訓練資料
-        feature_cols = [col for col in df.columns if col not in 
-                       ['timestamp', 'load_mw', 'solar_mw', 'wind_mw', 'tou_period',
-                        'total_renewable_mw', 'hydro_mw']]
+        feature_cols = [col for col in df.columns if col not in _EXCLUDE_COLS]
         
-        X = df[feature_cols].copy()
+        # 一次轉換為 float32 (唯一一次配置)，之後就地填充
+        X = df.loc[:, feature_cols].astype(np.float32)
         
         # 填充缺失值
-        X = X.fillna(method='ffill').fillna(method='bfill').fillna(0)
-        
-        # 1. 訓練負載預測模型
-        if 'load_mw' in df.columns:
-            logger.info("Training Load Forecaster...")
-            y_load = df['load_mw'].fillna(df['load_mw'].median())
-            self.load_forecaster.fit(X, y_load, use_transformer=use_transformer, **kwargs)
-        
-        # 2. 訓練再生能源預測模型
-        if 'solar_mw' in df.columns and 'wind_mw' in df.columns:
-            logger.info("Training Renewable Forecaster...")
-            y_solar = df['solar_mw'].fillna(0)
-            y_wind = df['wind_mw'].fillna(0)
-            self.renewable_forecaster.fit(X, y_solar, y_wind, use_lstm=use_lstm, **kwargs)
+        X.ffill(inplace=True)
+        X.bfill(inplace=True)
+        X.fillna(0, inplace=True)
+        
+        has_load = 'load_mw' in df.columns
+        has_renewable = 'solar_mw' in df.columns and 'wind_mw' in df.columns
+        
+        y_load = df['load_mw'].fillna(df['load_mw'].median()) if has_load else None
+        y_solar = df['solar_mw'].fillna(0) if has_renewable else None
+        y_wind = df['wind_mw'].fillna(0) if has_renewable else None
+        
+        if parallel_fit and has_load and has_renewable:
+            # 兩組樹模型互不相依，XGBoost/LightGBM/sklearn 在 C 層釋放 GIL，
+            # 各自分配一半 CPU 執行緒避免超額訂閱
+            tree_kwargs = {**kwargs, 'n_jobs': kwargs.get('n_jobs', max(1, (os.cpu_count() or 2) // 2))}
+            logger.info(f"Training tree models in parallel (n_jobs={tree_kwargs['n_jobs']} each)...")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [
+                    executor.submit(self.load_forecaster.fit, X, y_load,
+                                    use_transformer=False, **tree_kwargs),
+                    executor.submit(self.renewable_forecaster.fit, X, y_solar, y_wind,
+                                    use_lstm=False, **tree_kwargs)
+                ]
+                for future in futures:
+                    future.result()
+            
+            # torch.compile 追蹤與 CUDA graph 擷取非執行緒安全，神經網路於主執行緒依序訓練
+            if use_transformer:
+                logger.info("Training Load Transformer...")
+                self.load_forecaster.fit_transformer(X, y_load, **kwargs)
+            if use_lstm:
+                logger.info("Training Renewable LSTMs...")
+                self.renewable_forecaster.fit_lstm(X, y_solar, y_wind, **kwargs)
+        else:
+            # 1. 訓練負載預測模型
+            if has_load:
+                logger.info("Training Load Forecaster...")
+                self.load_forecaster.fit(X, y_load, use_transformer=use_transformer, **kwargs)
+            
+            # 2. 訓練再生能源預測模型
+            if has_renewable:
+                logger.info("Training Renewable Forecaster...")
+                self.renewable_forecaster.fit(X, y_solar, y_wind, use_lstm=use_lstm, **kwargs)
         
         self.is_fitted = True
-        self.feature_cols = feature_cols
+        self.feature_cols: Tuple[str, ...] = tuple(feature_cols)
         
         logger.info("=" * 50)
         logger.info("Hybrid Predictive Engine Training Complete")
@@ -95,6 +152,10 @@ class HybridPredictiveEngine:
         if not self.is_fitted:
             raise ValueError("Engine not fitted yet")
         
+        missing = set(self.feature_cols).difference(X.columns)
+        if missing:
+            logger.warning(f"Input is missing {len(missing)} training features: {sorted(missing)}")
+        
         results = {}
         
         # 負載預測
@@ -102,7 +163,7 @@ class HybridPredictiveEngine:
             results['load'] = self.load_forecaster.predict(X)
         except Exception as e:
             logger.error(f"Load prediction failed: {e}")
-            results['load'] = np.zeros(len(X))
+            results['load'] = self._zeros(len(X))
         
         # 再生能源預測
         try:
@@ -111,17 +172,28 @@ class HybridPredictiveEngine:
             results['wind'] = renewable_pred['wind']
         except Exception as e:
             logger.error(f"Renewable prediction failed: {e}")
-            results['solar'] = np.zeros(len(X))
-            results['wind'] = np.zeros(len(X))
+            results['solar'] = self._zeros(len(X))
+            results['wind'] = self._zeros(len(X))
         
         # 計算淨負載 (負載 - 再生能源)
-        results['net_load'] = np.maximum(
-            results['load'] - results['solar'] - results['wind'], 
-            0
-        )
+        # 就地運算，避免產生中間暫存陣列
+        net_load = np.array(results['load'], dtype=np.float32)
+        net_load -= np.asarray(results['solar'])
+        net_load -= np.asarray(results['wind'])
+        np.maximum(net_load, 0, out=net_load)
+        results['net_load'] = net_load
         
         return results
     
+    def _zeros(self, n: int) -> np.ndarray:
+        """取得長度 n 的唯讀零陣列 (依長度快取，避免失敗時重複配置)"""
+        arr = self._zero_cache.get(n)
+        if arr is None:
+            arr = np.zeros(n)
+            arr.setflags(write=False)
+            self._zero_cache[n] = arr
+        return arr
+    
     def rolling_forecast(self, current_features: pd.DataFrame, 
                         hours_ahead: int = 24) -> pd.DataFrame:
         """
@@ -141,31 +213,31 @@ class HybridPredictiveEngine:
             return pd.DataFrame()
         
         # 取最近的資料進行預測
-        recent_data = current_features.tail(168)  # 最近 7 天
+        recent_data = current_features.iloc[-168:]  # 最近 7 天 (位置切片，不複製)
         
         predictions = self.predict(recent_data)
         
         # 建立預測時間序列
         start_time = datetime.now().replace(minute=0, second=0, microsecond=0)
-        forecast_times = [start_time + timedelta(hours=i) for i in range(hours_ahead)]
+        forecast_times = pd.date_range(start=start_time, periods=hours_ahead, freq='h')
         
         # 取預測結果的最後 N 小時
         n = min(hours_ahead, len(predictions['load']))
+        forecast_times = forecast_times[:n]
         
         forecast_df = pd.DataFrame({
-            'timestamp': forecast_times[:n],
+            'timestamp': forecast_times,
             'predicted_load_mw': predictions['load'][-n:],
             'predicted_solar_mw': predictions['solar'][-n:],
             'predicted_wind_mw': predictions['wind'][-n:],
             'predicted_net_load_mw': predictions['net_load'][-n:]
         })
         
-        # 補充時間特徵
-        forecast_df['hour'] = forecast_df['timestamp'].dt.hour
-        forecast_df['tou_period'] = forecast_df['hour'].apply(self._get_tou_period)
-        forecast_df['tariff'] = forecast_df.apply(
-            lambda row: self._get_tariff(row['timestamp']), axis=1
-        )
+        # 補充時間特徵 (直接由 DatetimeIndex 向量化計算)
+        hours = forecast_times.hour.to_numpy()
+        forecast_df['hour'] = hours
+        forecast_df['tou_period'] = self._get_tou_periods(hours)
+        forecast_df['tariff'] = self._get_tariffs(forecast_times)
         
         # 計算預估成本
         forecast_df['estimated_cost'] = (
@@ -213,6 +285,32 @@ class HybridPredictiveEngine:
             else:
                 return settings.non_summer_off_peak_rate
     
+    @staticmethod
+    def _tou_masks(hours: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """向量化計算尖峰/半尖峰時段遮罩"""
+        is_peak = ((hours >= 10) & (hours < 12)) | ((hours >= 13) & (hours < 17))
+        is_half_peak = (((hours >= 7) & (hours < 10)) | (hours == 12) |
+                        ((hours >= 17) & (hours < 23)))
+        return is_peak, is_half_peak
+    
+    def _get_tou_periods(self, hours: np.ndarray) -> np.ndarray:
+        """向量化版本的 _get_tou_period"""
+        is_peak, is_half_peak = self._tou_masks(hours)
+        return np.select([is_peak, is_half_peak], ['peak', 'half_peak'], default='off_peak')
+    
+    def _get_tariffs(self, timestamps: pd.DatetimeIndex) -> np.ndarray:
+        """向量化版本的 _get_tariff"""
+        months = timestamps.month.to_numpy()
+        is_summer = (months >= 6) & (months <= 9)
+        is_peak, is_half_peak = self._tou_masks(timestamps.hour.to_numpy())
+        
+        peak = np.where(is_summer, settings.summer_peak_rate, settings.non_summer_peak_rate)
+        half_peak = np.where(is_summer, settings.summer_half_peak_rate,
+                             settings.non_summer_half_peak_rate)
+        off_peak = np.where(is_summer, settings.summer_off_peak_rate,
+                            settings.non_summer_off_peak_rate)
+        return np.select([is_peak, is_half_peak], [peak, half_peak], default=off_peak)
+    
     def evaluate(self, X: pd.DataFrame, y_load: pd.Series, 
                  y_solar: pd.Series, y_wind: pd.Series) -> Dict[str, Any]:
         """評估所有模型"""
@@ -268,33 +366,39 @@ class HybridPredictiveEngine:
         if forecast_df.empty:
             return {}
         
+        # 單次彙總所有統計量，避免逐欄重複掃描
+        stats = forecast_df[['predicted_load_mw', 'predicted_solar_mw',
+                             'predicted_wind_mw', 'estimated_cost']].agg(['mean', 'max', 'min', 'sum'])
+        tou_cost = forecast_df.groupby('tou_period')['estimated_cost'].sum()
+        peak_idx = int(forecast_df['predicted_load_mw'].to_numpy().argmax())
+        
         summary = {
             'prediction_time': self.last_prediction_time.isoformat() if self.last_prediction_time else None,
             'forecast_hours': len(forecast_df),
             'load': {
-                'avg_mw': float(forecast_df['predicted_load_mw'].mean()),
-                'max_mw': float(forecast_df['predicted_load_mw'].max()),
-                'min_mw': float(forecast_df['predicted_load_mw'].min()),
-                'peak_hour': int(forecast_df.loc[forecast_df['predicted_load_mw'].idxmax(), 'hour'])
+                'avg_mw': float(stats.at['mean', 'predicted_load_mw']),
+                'max_mw': float(stats.at['max', 'predicted_load_mw']),
+                'min_mw': float(stats.at['min', 'predicted_load_mw']),
+                'peak_hour': int(forecast_df['hour'].iat[peak_idx])
             },
             'solar': {
-                'avg_mw': float(forecast_df['predicted_solar_mw'].mean()),
-                'max_mw': float(forecast_df['predicted_solar_mw'].max()),
-                'total_mwh': float(forecast_df['predicted_solar_mw'].sum())
+                'avg_mw': float(stats.at['mean', 'predicted_solar_mw']),
+                'max_mw': float(stats.at['max', 'predicted_solar_mw']),
+                'total_mwh': float(stats.at['sum', 'predicted_solar_mw'])
             },
             'wind': {
-                'avg_mw': float(forecast_df['predicted_wind_mw'].mean()),
-                'total_mwh': float(forecast_df['predicted_wind_mw'].sum())
+                'avg_mw': float(stats.at['mean', 'predicted_wind_mw']),
+                'total_mwh': float(stats.at['sum', 'predicted_wind_mw'])
             },
             'cost': {
-                'total_estimated': float(forecast_df['estimated_cost'].sum()),
-                'avg_hourly': float(forecast_df['estimated_cost'].mean()),
-                'peak_cost': float(forecast_df[forecast_df['tou_period'] == 'peak']['estimated_cost'].sum()),
-                'off_peak_cost': float(forecast_df[forecast_df['tou_period'] == 'off_peak']['estimated_cost'].sum())
+                'total_estimated': float(stats.at['sum', 'estimated_cost']),
+                'avg_hourly': float(stats.at['mean', 'estimated_cost']),
+                'peak_cost': float(tou_cost.get('peak', 0.0)),
+                'off_peak_cost': float(tou_cost.get('off_peak', 0.0))
             },
             'renewable_ratio': float(
-                (forecast_df['predicted_solar_mw'].sum() + forecast_df['predicted_wind_mw'].sum()) /
-                (forecast_df['predicted_load_mw'].sum() + 1e-8) * 100
+                (stats.at['sum', 'predicted_solar_mw'] + stats.at['sum', 'predicted_wind_mw']) /
+                (stats.at['sum', 'predicted_load_mw'] + 1e-8) * 100
             )
         }
         
@@ -3,7 +3,11 @@ Load Forecaster - 電力負載預測模型
 整合 XGBoost, LightGBM, Prophet 和 Transformer
 """
 
+import copy
+import os
+import threading
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, Tuple, List
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -12,7 +16,8 @@ import numpy as np
 import pandas as pd
 import torch
 import torch.nn as nn
-from torch.utils.data import DataLoader, TensorDataset
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, Dataset
 from sklearn.preprocessing import StandardScaler
 from loguru import logger
 
@@ -21,21 +26,86 @@ from ecogrid.models.base_model import BasePredictor
 
 warnings.filterwarnings('ignore')
 
+# 集成預測共用的執行緒池：所有 LoadForecaster 共用一個，首次預測時建立
+_predict_executor: Optional[ThreadPoolExecutor] = None
+_predict_executor_lock = threading.Lock()
+
+
+def _get_predict_executor() -> ThreadPoolExecutor:
+    """取得模組層級的預測執行緒池 (只建立一次；不綁在實例上，LoadForecaster 仍可 pickle)"""
+    global _predict_executor
+    if _predict_executor is None:
+        with _predict_executor_lock:
+            if _predict_executor is None:
+                _predict_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="load_forecaster")
+    return _predict_executor
+
+
+def _seed_worker(worker_id: int):
+    """DataLoader worker 亂數種子 (模組層級函式，Windows spawn 可 pickle)"""
+    np.random.seed(torch.initial_seed() % 2**32)
+
+
+def _loader_kwargs(use_cuda: bool, num_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    DataLoader 效能參數
+    
+    CUDA 訓練時以背景 worker 預取並 pin 住 batch，與 GPU 運算重疊；
+    CPU 訓練的資料量小，worker 啟動成本高於效益，維持單執行緒
+    """
+    if num_workers is None:
+        num_workers = min(4, (os.cpu_count() or 2) // 2) if use_cuda else 0
+    
+    loader_kwargs: Dict[str, Any] = {'num_workers': num_workers, 'pin_memory': use_cuda}
+    if num_workers > 0:
+        loader_kwargs.update(persistent_workers=True, prefetch_factor=4,
+                             worker_init_fn=_seed_worker)
+    return loader_kwargs
+
+
+class _WindowDataset(Dataset):
+    """
+    滑動視窗資料集
+    
+    windows 為 sliding_window_view 產生的 (n_windows, seq_len, input_dim) 視圖；
+    建構時還原為底層連續的 (n_windows + seq_len - 1, input_dim) 陣列，樣本以切片取得。
+    DataLoader worker pickle 資料集時只複製這份原始特徵，而非展開後的 seq_len 倍視窗
+    """
+    
+    def __init__(self, windows: np.ndarray, targets: torch.Tensor):
+        self.seq_len = windows.shape[1]
+        # 第 i 個視窗的第一列即原始第 i 列，再接上最後一個視窗的其餘列
+        self.base = np.concatenate([windows[:, 0], windows[-1, 1:]]).astype(np.float32, copy=False)
+        self.targets = targets
+    
+    def __len__(self) -> int:
+        return len(self.targets)
+    
+    def __getitem__(self, idx: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        return torch.from_numpy(self.base[idx:idx + self.seq_len]), self.targets[idx]
+
+
+def _to_float32(X: pd.DataFrame) -> np.ndarray:
+    """
+    樹模型輸入：直接轉為 float32 陣列
+    
+    Histogram 樹模型對特徵做分位數分箱，標準化不影響切分結果，故不需 StandardScaler
+    """
+    return X.to_numpy(dtype=np.float32, copy=False)
+
 
 class XGBoostForecaster(BasePredictor):
     """XGBoost 負載預測器 - 處理 Tabular 特徵"""
     
     def __init__(self):
         super().__init__("xgboost_load_forecaster")
-        self.scaler = StandardScaler()
     
     def fit(self, X: pd.DataFrame, y: pd.Series, **kwargs) -> 'XGBoostForecaster':
         import xgboost as xgb
         
         self.feature_names = list(X.columns)
-        
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X)
+        self._feature_key = tuple(self.feature_names)
+        X_arr = _to_float32(X)
         
         # XGBoost parameters optimized for time series
         params = {
@@ -47,17 +117,24 @@ class XGBoostForecaster(BasePredictor):
             'subsample': 0.8,
             'colsample_bytree': 0.8,
             'random_state': 42,
-            'n_jobs': -1
+            'tree_method': 'hist'
         }
         
-        # GPU support if available
-        if torch.cuda.is_available():
-            params['tree_method'] = 'hist'
+        # 小資料集上 GPU 反而較慢，僅在資料量夠大時使用 GPU；
+        # CPU hist 在過多執行緒下效能下降，限制執行緒數
+        if torch.cuda.is_available() and X.shape[0] * X.shape[1] > 1_000_000:
             params['device'] = 'cuda'
             logger.info("XGBoost using GPU acceleration")
+        else:
+            params['device'] = 'cpu'
+            params['n_jobs'] = kwargs.get('n_jobs', min(8, os.cpu_count() or 1))
+            logger.info(f"XGBoost using CPU hist with {params['n_jobs']} threads")
         
         self.model = xgb.XGBRegressor(**params)
-        self.model.fit(X_scaled, y, eval_set=[(X_scaled, y)], verbose=False)
+        if kwargs.get('eval_train', False):
+            self.model.fit(X_arr, y, eval_set=[(X_arr, y)], verbose=False)
+        else:
+            self.model.fit(X_arr, y, verbose=False)
         
         self.is_fitted = True
         self.training_metrics = self.evaluate(X, y)
@@ -69,9 +146,11 @@ class XGBoostForecaster(BasePredictor):
         if not self.is_fitted:
             raise ValueError("Model not fitted yet")
         
-        X = self._validate_features(X)
-        X_scaled = self.scaler.transform(X)
-        return self.model.predict(X_scaled)
+        # 欄位順序已一致時略過對齊 (由磁碟載入的模型沒有 _feature_key，改由 feature_names 推得)
+        feature_key = getattr(self, '_feature_key', None) or tuple(self.feature_names)
+        if tuple(X.columns) != feature_key:
+            X = self._validate_features(X)
+        return self.model.predict(_to_float32(X))
 
 
 class LightGBMForecaster(BasePredictor):
@@ -79,13 +158,13 @@ class LightGBMForecaster(BasePredictor):
     
     def __init__(self):
         super().__init__("lightgbm_load_forecaster")
-        self.scaler = StandardScaler()
     
     def fit(self, X: pd.DataFrame, y: pd.Series, **kwargs) -> 'LightGBMForecaster':
         import lightgbm as lgb
         
         self.feature_names = list(X.columns)
-        X_scaled = self.scaler.fit_transform(X)
+        self._feature_key = tuple(self.feature_names)
+        X_arr = _to_float32(X)
         
         params = {
             'objective': 'regression',
@@ -98,17 +177,25 @@ class LightGBMForecaster(BasePredictor):
             'subsample': 0.8,
             'colsample_bytree': 0.8,
             'random_state': 42,
-            'n_jobs': -1,
+            'n_jobs': kwargs.get('n_jobs', min(8, os.cpu_count() or 1)),
             'verbose': -1
         }
         
-        # GPU support
-        if torch.cuda.is_available():
-            params['device'] = 'gpu'
-            logger.info("LightGBM using GPU acceleration")
+        # GPU support: 使用 CUDA backend (需以 CUDA 編譯的 LightGBM)，
+        # 小資料集的傳輸成本高於加速效益，維持 CPU
+        self.model = None
+        if torch.cuda.is_available() and len(X) > 10_000:
+            try:
+                self.model = lgb.LGBMRegressor(**params, device='cuda', max_bin=63)
+                self.model.fit(X_arr, y)
+                logger.info("LightGBM using CUDA acceleration")
+            except Exception as e:
+                logger.warning(f"LightGBM CUDA training unavailable, falling back to CPU: {e}")
+                self.model = None
         
-        self.model = lgb.LGBMRegressor(**params)
-        self.model.fit(X_scaled, y)
+        if self.model is None:
+            self.model = lgb.LGBMRegressor(**params)
+            self.model.fit(X_arr, y)
         
         self.is_fitted = True
         self.training_metrics = self.evaluate(X, y)
@@ -120,9 +207,11 @@ class LightGBMForecaster(BasePredictor):
         if not self.is_fitted:
             raise ValueError("Model not fitted yet")
         
-        X = self._validate_features(X)
-        X_scaled = self.scaler.transform(X)
-        return self.model.predict(X_scaled)
+        # 欄位順序已一致時略過對齊 (由磁碟載入的模型沒有 _feature_key，改由 feature_names 推得)
+        feature_key = getattr(self, '_feature_key', None) or tuple(self.feature_names)
+        if tuple(X.columns) != feature_key:
+            X = self._validate_features(X)
+        return self.model.predict(_to_float32(X))
 
 
 class TransformerBlock(nn.Module):
@@ -130,7 +219,14 @@ class TransformerBlock(nn.Module):
     
     def __init__(self, d_model: int, n_heads: int, d_ff: int, dropout: float = 0.1):
         super().__init__()
-        self.attention = nn.MultiheadAttention(d_model, n_heads, dropout=dropout, batch_first=True)
+        self.d_model = d_model
+        self.n_heads = n_heads
+        self.head_dim = d_model // n_heads
+        self.attn_dropout = dropout
+        
+        # 融合的 QKV 投影，搭配 scaled_dot_product_attention (Flash / memory-efficient kernel)
+        self.qkv = nn.Linear(d_model, 3 * d_model)
+        self.out_proj = nn.Linear(d_model, d_model)
         self.norm1 = nn.LayerNorm(d_model)
         self.norm2 = nn.LayerNorm(d_model)
         self.ff = nn.Sequential(
@@ -142,8 +238,16 @@ class TransformerBlock(nn.Module):
         )
     
     def forward(self, x):
-        # Self-attention
-        attn_out, _ = self.attention(x, x, x)
+        batch_size, n_tokens = x.size(0), x.size(1)
+        
+        # Self-attention: (3, batch, n_heads, n_tokens, head_dim)
+        qkv = self.qkv(x).view(batch_size, n_tokens, 3, self.n_heads, self.head_dim)
+        qkv = qkv.permute(2, 0, 3, 1, 4)
+        attn = F.scaled_dot_product_attention(
+            qkv[0], qkv[1], qkv[2],
+            dropout_p=self.attn_dropout if self.training else 0.0
+        )
+        attn_out = self.out_proj(attn.transpose(1, 2).reshape(batch_size, n_tokens, self.d_model))
         x = self.norm1(x + attn_out)
         
         # Feed forward
@@ -194,12 +298,12 @@ class PatchTSTModel(nn.Module):
     
     def forward(self, x):
         # x shape: (batch, seq_len, input_dim)
-        batch_size = x.shape[0]
+        batch_size = x.size(0)
         
         # Create patches: (batch, n_patches, patch_size * input_dim)
-        x = x.unfold(1, self.patch_size, self.patch_size)  # (batch, n_patches, input_dim, patch_size)
-        x = x.permute(0, 1, 3, 2)  # (batch, n_patches, patch_size, input_dim)
-        x = x.reshape(batch_size, self.n_patches, -1)  # (batch, n_patches, patch_size * input_dim)
+        # 連續記憶體直接 reshape 為 view，不需 unfold + permute 的複製
+        x = x[:, :self.n_patches * self.patch_size]
+        x = x.reshape(batch_size, self.n_patches, self.patch_size * self.input_dim)
         
         # Patch embedding
         x = self.patch_embed(x)  # (batch, n_patches, d_model)
@@ -233,6 +337,7 @@ class TransformerForecaster(BasePredictor):
         self.scaler_y = StandardScaler()
         self.device = self._get_device()
         self.model: Optional[PatchTSTModel] = None
+        self._scripted: Optional[torch.jit.ScriptModule] = None
         
         logger.info(f"TransformerForecaster initialized on {self.device}")
     
@@ -241,7 +346,6 @@ class TransformerForecaster(BasePredictor):
         if torch.cuda.is_available():
             # 設定 GPU 記憶體上限以避免 OOM
             torch.cuda.set_per_process_memory_fraction(settings.gpu_memory_fraction)
-            torch.cuda.empty_cache()
             device = torch.device('cuda')
             logger.info(f"Using GPU: {torch.cuda.get_device_name(0)}")
             logger.info(f"GPU Memory Fraction: {settings.gpu_memory_fraction}")
@@ -252,7 +356,11 @@ class TransformerForecaster(BasePredictor):
     
     def _prepare_sequences(self, X: pd.DataFrame, y: Optional[pd.Series] = None) -> Tuple:
         """準備序列資料"""
-        X_values = X.values
+        # 直接取得 float32 陣列 (可共用底層緩衝區時不複製)
+        if isinstance(X, pd.DataFrame):
+            X_values = X.to_numpy(dtype=np.float32, copy=False)
+        else:
+            X_values = np.ascontiguousarray(X, dtype=np.float32)
         
         # 標準化
         if not hasattr(self.scaler_X, 'mean_') or self.scaler_X.mean_ is None:
@@ -260,22 +368,22 @@ class TransformerForecaster(BasePredictor):
         else:
             X_scaled = self.scaler_X.transform(X_values)
         
-        sequences = []
-        targets = []
-        
-        # 建立滑動視窗序列
-        for i in range(len(X_scaled) - self.seq_len - self.pred_len + 1):
-            seq = X_scaled[i:i + self.seq_len]
-            sequences.append(seq)
-            
-            if y is not None:
-                target = y.values[i + self.seq_len:i + self.seq_len + self.pred_len]
-                targets.append(target)
-        
-        sequences = np.array(sequences)
+        # 建立滑動視窗序列 (stride tricks 零複製視圖)
+        n_windows = len(X_scaled) - self.seq_len - self.pred_len + 1
+        if n_windows <= 0:
+            sequences = np.empty((0, self.seq_len, X_scaled.shape[1]), dtype=X_scaled.dtype)
+        else:
+            sequences = np.lib.stride_tricks.sliding_window_view(
+                X_scaled, (self.seq_len, X_scaled.shape[1])
+            )[:n_windows, 0]  # (n_windows, seq_len, input_dim)
         
         if y is not None:
-            targets = np.array(targets)
+            if n_windows <= 0:
+                targets = np.empty((0, self.pred_len), dtype=np.float32)
+            else:
+                targets = np.lib.stride_tricks.sliding_window_view(
+                    np.asarray(y, dtype=np.float32), self.pred_len
+                )[self.seq_len:self.seq_len + n_windows]  # (n_windows, pred_len)
             # 標準化目標
             targets_reshaped = targets.reshape(-1, 1)
             if not hasattr(self.scaler_y, 'mean_') or self.scaler_y.mean_ is None:
@@ -300,55 +408,78 @@ class TransformerForecaster(BasePredictor):
             return self
         
         # 建立模型
-        self.model = PatchTSTModel(
-            input_dim=input_dim,
-            seq_len=self.seq_len,
-            pred_len=self.pred_len,
-            d_model=kwargs.get('d_model', 64),
-            n_heads=kwargs.get('n_heads', 4),
-            n_layers=kwargs.get('n_layers', 2),
-            patch_size=kwargs.get('patch_size', 8),
-            dropout=kwargs.get('dropout', 0.1)
-        ).to(self.device)
-        
-        # 轉換為 Tensor
-        X_tensor = torch.FloatTensor(X_seq).to(self.device)
-        y_tensor = torch.FloatTensor(y_seq).to(self.device)
-        
-        # 資料集
-        dataset = TensorDataset(X_tensor, y_tensor)
+        self.model_config = {
+            'd_model': kwargs.get('d_model', 64),
+            'n_heads': kwargs.get('n_heads', 4),
+            'n_layers': kwargs.get('n_layers', 2),
+            'patch_size': kwargs.get('patch_size', 8),
+            'dropout': kwargs.get('dropout', 0.1)
+        }
+        self.model = self._build_model(input_dim).to(self.device)
+        self._scripted = None
+        train_model = self._compile_for_training(
+            kwargs.get('compile_model', self.device.type == 'cuda')
+        )
+        
+        # 資料保留在 CPU，由 DataLoader 產生 pinned batch 後非同步搬移至 GPU，
+        # 避免整個視窗化資料集複製一份在 GPU 記憶體中
+        use_cuda = self.device.type == 'cuda'
+        y_tensor = torch.from_numpy(np.ascontiguousarray(y_seq, dtype=np.float32))
+        
+        # 資料集: 由連續原始列按需切片取樣，不展開 (n_windows, seq_len, input_dim) 的完整陣列
+        dataset = _WindowDataset(X_seq, y_tensor)
         batch_size = min(settings.batch_size, len(dataset))
-        dataloader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
+        dataloader = DataLoader(dataset, batch_size=batch_size, shuffle=True, drop_last=True,
+                                **_loader_kwargs(use_cuda, kwargs.get('num_workers')))
         
         # 訓練設定
         optimizer = torch.optim.AdamW(self.model.parameters(), lr=kwargs.get('lr', 1e-3))
         scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=kwargs.get('epochs', 50))
         criterion = nn.MSELoss()
         
+        # 混合精度訓練 (僅 CUDA)：Ampere 以上使用 BF16，否則 FP16 + GradScaler
+        use_amp = use_cuda and kwargs.get('use_amp', True)
+        amp_dtype = (torch.bfloat16 if use_amp and torch.cuda.is_bf16_supported()
+                     else torch.float16)
+        grad_scaler = torch.cuda.amp.GradScaler(enabled=use_amp and amp_dtype == torch.float16)
+        
+        # 梯度累積：每 accum_steps 個 batch 更新一次參數，以較小記憶體達到更大的有效批次
+        accum_steps = max(1, kwargs.get('accum_steps', 1))
+        n_batches = len(dataloader)
+        
         epochs = kwargs.get('epochs', 50)
         best_loss = float('inf')
         patience = 10
         patience_counter = 0
         
-        logger.info(f"Training Transformer for {epochs} epochs...")
+        logger.info(f"Training Transformer for {epochs} epochs (AMP: {amp_dtype if use_amp else 'off'})...")
         
         self.model.train()
         for epoch in range(epochs):
-            total_loss = 0
-            for batch_X, batch_y in dataloader:
-                optimizer.zero_grad()
+            # 在裝置上累加 loss，每個 epoch 只同步一次
+            total_loss = torch.zeros((), device=self.device)
+            optimizer.zero_grad(set_to_none=True)
+            for step, (batch_X, batch_y) in enumerate(dataloader, start=1):
+                batch_X = batch_X.to(self.device, non_blocking=use_cuda)
+                batch_y = batch_y.to(self.device, non_blocking=use_cuda)
+                
+                with torch.autocast(device_type=self.device.type, dtype=amp_dtype, enabled=use_amp):
+                    outputs = train_model(batch_X)
+                    loss = criterion(outputs.float(), batch_y)
                 
-                outputs = self.model(batch_X)
-                loss = criterion(outputs, batch_y)
+                grad_scaler.scale(loss / accum_steps).backward()
                 
-                loss.backward()
-                torch.nn.utils.clip_grad_norm_(self.model.parameters(), 1.0)
-                optimizer.step()
+                if step % accum_steps == 0 or step == n_batches:
+                    grad_scaler.unscale_(optimizer)
+                    torch.nn.utils.clip_grad_norm_(self.model.parameters(), 1.0, foreach=True)
+                    grad_scaler.step(optimizer)
+                    grad_scaler.update()
+                    optimizer.zero_grad(set_to_none=True)
                 
-                total_loss += loss.item()
+                total_loss += loss.detach()
             
             scheduler.step()
-            avg_loss = total_loss / len(dataloader)
+            avg_loss = (total_loss / n_batches).item()
             
             # Early stopping
             if avg_loss < best_loss:
@@ -362,16 +493,96 @@ class TransformerForecaster(BasePredictor):
             
             if (epoch + 1) % 10 == 0:
                 logger.info(f"Epoch {epoch + 1}/{epochs}, Loss: {avg_loss:.6f}")
-            
-            # 清理 GPU 記憶體
-            if self.device.type == 'cuda':
-                torch.cuda.empty_cache()
+        
+        # 訓練結束後一次性釋放快取的 GPU 記憶體
+        if use_cuda:
+            torch.cuda.empty_cache()
         
         self.is_fitted = True
         logger.info(f"Transformer training complete, Best Loss: {best_loss:.6f}")
         
         return self
     
+    def _build_model(self, input_dim: int) -> PatchTSTModel:
+        return PatchTSTModel(
+            input_dim=input_dim,
+            seq_len=self.seq_len,
+            pred_len=self.pred_len,
+            **self.model_config
+        )
+    
+    def quantize(self) -> nn.Module:
+        """int8 動態量化 nn.Linear (CPU 推論用，速度約 2-4 倍、模型大小減半)"""
+        model = copy.deepcopy(self.model).cpu().eval()
+        return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+    
+    def load(self, path: Optional[Path] = None) -> 'TransformerForecaster':
+        """
+        載入 LoadForecaster.save 儲存的 Transformer checkpoint
+        
+        在 CPU 上推論時若 checkpoint 含量化權重，直接使用 int8 量化模型
+        """
+        load_path = path or settings.model_path / "transformer_load_forecaster.pt"
+        
+        if not load_path.exists():
+            raise FileNotFoundError(f"Model not found at {load_path}")
+        
+        checkpoint = torch.load(load_path, map_location='cpu', weights_only=False)
+        
+        self.scaler_X = checkpoint['scaler_X']
+        self.scaler_y = checkpoint['scaler_y']
+        self.feature_names = checkpoint['feature_names']
+        self.seq_len = checkpoint['seq_len']
+        self.pred_len = checkpoint['pred_len']
+        self.model_config = checkpoint['model_config']
+        
+        self.model = self._build_model(len(self.feature_names))
+        self.model.load_state_dict(checkpoint['model_state_dict'])
+        self.model.to(self.device)
+        self._scripted = None
+        
+        if self.device.type == 'cpu' and checkpoint.get('quantized', False):
+            quantized = torch.ao.quantization.quantize_dynamic(
+                self._build_model(len(self.feature_names)).eval(),
+                {nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+            quantized.load_state_dict(checkpoint['quantized_state_dict'])
+            self._scripted = quantized
+            logger.info("Using int8 quantized Transformer for CPU inference")
+        
+        self.is_fitted = True
+        logger.info(f"Model loaded from {load_path}")
+        
+        return self
+    
+    def _compile_for_training(self, enabled: bool) -> nn.Module:
+        """
+        以 torch.compile (Inductor) 融合 patch embed / 位置編碼 / dropout / attention 等小算子
+        
+        只包裝訓練用的前向，self.model 仍保留 eager 模組供 state_dict 儲存與 TorchScript 推論
+        """
+        if not enabled or not hasattr(torch, 'compile'):
+            return self.model
+        
+        try:
+            from torch import _dynamo
+            _dynamo.config.cache_size_limit = 64
+            return torch.compile(self.model, mode='reduce-overhead', fullgraph=False, dynamic=False)
+        except Exception as e:
+            logger.warning(f"torch.compile unavailable, training eager model: {e}")
+            return self.model
+    
+    def _get_inference_model(self) -> nn.Module:
+        """取得推論用模型：首次呼叫時以 TorchScript 編譯，失敗則退回 eager 模式"""
+        if self._scripted is None:
+            self.model.eval()
+            try:
+                self._scripted = torch.jit.optimize_for_inference(torch.jit.script(self.model))
+            except Exception as e:
+                logger.warning(f"TorchScript compilation failed, using eager model: {e}")
+                self._scripted = self.model
+        return self._scripted
+    
     def predict(self, X: pd.DataFrame) -> np.ndarray:
         if not self.is_fitted or self.model is None:
             raise ValueError("Model not fitted yet")
@@ -383,34 +594,25 @@ class TransformerForecaster(BasePredictor):
             logger.warning("Insufficient data for prediction")
             return np.array([])
         
-        self.model.eval()
+        # 只回傳最後一個視窗的預測：僅對該視窗推論與反標準化
+        model = self._get_inference_model()
         with torch.no_grad():
-            X_tensor = torch.FloatTensor(X_seq).to(self.device)
-            predictions = self.model(X_tensor).cpu().numpy()
+            last_window = np.ascontiguousarray(X_seq[-1:], dtype=np.float32)
+            X_tensor = torch.from_numpy(last_window).to(self.device)
+            last = model(X_tensor).cpu().numpy()
         
         # 反標準化
-        predictions_flat = predictions.reshape(-1, 1)
-        predictions_original = self.scaler_y.inverse_transform(predictions_flat)
-        predictions = predictions_original.reshape(predictions.shape)
-        
-        # 返回最後一個預測
-        return predictions[-1] if len(predictions) > 0 else np.array([])
+        return self.scaler_y.inverse_transform(last.reshape(-1, 1)).ravel()
     
     def predict_rolling(self, X: pd.DataFrame, steps: int = 24) -> np.ndarray:
         """滾動式預測"""
-        predictions = []
-        current_X = X.copy()
-        
-        for _ in range(steps // self.pred_len + 1):
-            pred = self.predict(current_X)
-            if len(pred) == 0:
-                break
-            predictions.extend(pred[:min(steps - len(predictions), len(pred))])
-            
-            if len(predictions) >= steps:
-                break
+        # 輸入不隨迭代更新，每輪預測皆相同：只做一次前向推論再鋪滿 steps
+        pred = self.predict(X)
+        if len(pred) == 0:
+            return np.array([])
         
-        return np.array(predictions[:steps])
+        n_repeats = -(-steps // len(pred))
+        return np.tile(pred, n_repeats)[:steps]
 
 
 class LoadForecaster:
@@ -445,12 +647,8 @@ class LoadForecaster:
             logger.error(f"LightGBM training failed: {e}")
         
         # 訓練 Transformer (可選)
-        if use_transformer and len(X) > 200:
-            try:
-                self.transformer_model.fit(X, y, **kwargs)
-            except Exception as e:
-                logger.error(f"Transformer training failed: {e}")
-                self.weights = {'xgb': 0.5, 'lgbm': 0.5, 'transformer': 0.0}
+        if use_transformer:
+            self.fit_transformer(X, y, **kwargs)
         else:
             self.weights = {'xgb': 0.5, 'lgbm': 0.5, 'transformer': 0.0}
         
@@ -459,50 +657,67 @@ class LoadForecaster:
         
         return self
     
-    def predict(self, X: pd.DataFrame) -> np.ndarray:
-        """集成預測"""
-        predictions = []
-        weights = []
-        
-        if self.xgb_model.is_fitted:
+    def fit_transformer(self, X: pd.DataFrame, y: pd.Series, **kwargs):
+        """訓練 Transformer 並更新集成權重 (可與樹模型分開、於主執行緒依序呼叫)"""
+        if len(X) > 200:
             try:
-                pred = self.xgb_model.predict(X)
-                predictions.append(pred)
-                weights.append(self.weights['xgb'])
+                self.transformer_model.fit(X, y, **kwargs)
+                self.weights = {'xgb': 0.35, 'lgbm': 0.35, 'transformer': 0.30}
+                return self
             except Exception as e:
-                logger.warning(f"XGBoost prediction failed: {e}")
+                logger.error(f"Transformer training failed: {e}")
         
+        self.weights = {'xgb': 0.5, 'lgbm': 0.5, 'transformer': 0.0}
+        return self
+    
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """集成預測"""
+        members = []
+        if self.xgb_model.is_fitted:
+            members.append(('xgb', 'XGBoost', self.xgb_model))
         if self.lgbm_model.is_fitted:
-            try:
-                pred = self.lgbm_model.predict(X)
-                predictions.append(pred)
-                weights.append(self.weights['lgbm'])
-            except Exception as e:
-                logger.warning(f"LightGBM prediction failed: {e}")
-        
+            members.append(('lgbm', 'LightGBM', self.lgbm_model))
         if self.transformer_model.is_fitted and self.weights['transformer'] > 0:
+            members.append(('transformer', 'Transformer', self.transformer_model))
+        
+        # 先對齊一次特徵 (補齊缺失欄位會修改 DataFrame，不可在多執行緒中同時進行)
+        if members:
+            X = members[0][2]._validate_features(X)
+        
+        # 各子模型互不相依，並行預測 (XGBoost/LightGBM/torch 推論會釋放 GIL)
+        executor = _get_predict_executor()
+        futures = [
+            (key, label, executor.submit(model.predict, X))
+            for key, label, model in members
+        ]
+        
+        predictions = []
+        weights = []
+        
+        for key, label, future in futures:
             try:
-                pred = self.transformer_model.predict(X)
-                if len(pred) > 0:
-                    # Transformer 預測的是未來序列，取均值作為單點預測
-                    pred = np.full(len(X), np.mean(pred))
-                    predictions.append(pred)
-                    weights.append(self.weights['transformer'])
+                pred = future.result()
             except Exception as e:
-                logger.warning(f"Transformer prediction failed: {e}")
+                logger.warning(f"{label} prediction failed: {e}")
+                continue
+            
+            if key == 'transformer':
+                if len(pred) == 0:
+                    continue
+                # Transformer 預測的是未來序列，取均值作為單點預測
+                pred = np.full(len(X), np.mean(pred))
+            
+            predictions.append(pred)
+            weights.append(self.weights[key])
         
         if not predictions:
             raise ValueError("No model available for prediction")
         
-        # 加權平均
-        weights = np.array(weights)
-        weights = weights / weights.sum()
-        
-        ensemble_pred = np.zeros_like(predictions[0])
-        for pred, w in zip(predictions, weights):
-            ensemble_pred += w * pred
+        # 加權平均: (k,) @ (k, n) 單次 GEMV
+        weights = np.asarray(weights, dtype=np.float32)
+        weights /= weights.sum()
         
-        return ensemble_pred
+        return weights @ np.stack(predictions).astype(np.float32, copy=False)
     
     def evaluate(self, X: pd.DataFrame, y: pd.Series) -> Dict[str, Dict[str, float]]:
         """評估所有模型"""
@@ -547,7 +762,11 @@ class LoadForecaster:
                 'scaler_y': self.transformer_model.scaler_y,
                 'feature_names': self.transformer_model.feature_names,
                 'seq_len': self.transformer_model.seq_len,
-                'pred_len': self.transformer_model.pred_len
+                'pred_len': self.transformer_model.pred_len,
+                'model_config': self.transformer_model.model_config,
+                # CPU 推論用的 int8 動態量化權重
+                'quantized': True,
+                'quantized_state_dict': self.transformer_model.quantize().state_dict()
             }, base_path / "transformer_load_forecaster.pt")
         
         logger.info(f"LoadForecaster models saved to {base_path}")
@@ -1,8 +1,11 @@
 """
 TOU Optimizer - 時間電價優化模組
-使用混合整數線性規劃 (MILP) 進行電力成本優化
+預設以貪婪啟發式排程，可選線性規劃 (LP，可選 MILP 充放電互斥) 進行電力成本優化
 """
 
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime, timedelta
 from dataclasses import dataclass
@@ -18,9 +21,93 @@ except ImportError:
     PULP_AVAILABLE = False
     logger.warning("PuLP not available, optimization features limited")
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 from ecogrid.config.settings import settings
 
 
+if PULP_AVAILABLE and getattr(pulp, 'HiGHS', None) is not None:  # PuLP >= 2.8
+    class _WarmStartHiGHS(pulp.HiGHS):
+        """HiGHS 記憶體內求解器：求解前將變數初始值 (setInitialValue) 傳入作為起始解"""
+        
+        def callSolver(self, lp):
+            start = [(var.index, var.varValue) for var in lp.variables()
+                     if var.varValue is not None]
+            if start:
+                indices, values = zip(*start)
+                lp.solverModel.setSolution(len(indices), np.array(indices, dtype=np.int32),
+                                           np.array(values, dtype=np.float64))
+            super().callSolver(lp)
+else:
+    _WarmStartHiGHS = None
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _reco_stats(load, solar, grid, battery, tariffs, peak_thr, offpeak_thr):
+        """
+        建議所需的統計量，單次迴圈完成所有遮罩與加總
+        
+        Returns:
+            (peak_load, peak_grid, first_peak, last_peak, total_discharge,
+             solar_available, solar_used, off_peak_charge, first_off_peak, last_off_peak)；
+            無尖峰/離峰時段時 first/last 為 -1
+        """
+        peak_load = 0.0
+        peak_grid = 0.0
+        off_peak_charge = 0.0
+        first_peak = -1
+        last_peak = -1
+        first_off = -1
+        last_off = -1
+        n_battery = battery.shape[0]
+        for t in range(tariffs.shape[0]):
+            if tariffs[t] >= peak_thr:
+                peak_load += load[t]
+                peak_grid += grid[t]
+                if first_peak < 0:
+                    first_peak = t
+                last_peak = t
+            if tariffs[t] <= offpeak_thr:
+                if t < n_battery and battery[t] > 0:
+                    off_peak_charge += battery[t]
+                if first_off < 0:
+                    first_off = t
+                last_off = t
+        
+        total_discharge = 0.0
+        for t in range(n_battery):
+            if battery[t] < 0:
+                total_discharge -= battery[t]
+        
+        solar_available = 0.0
+        solar_used = 0.0
+        for t in range(solar.shape[0]):
+            solar_available += solar[t]
+            solar_used += min(solar[t], load[t])
+        
+        return (peak_load, peak_grid, first_peak, last_peak, total_discharge,
+                solar_available, solar_used, off_peak_charge, first_off, last_off)
+else:
+    def _reco_stats(load, solar, grid, battery, tariffs, peak_thr, offpeak_thr):
+        """建議所需的統計量 (未安裝 numba 時的 NumPy 版本，回傳值同上)"""
+        peak_hours = np.flatnonzero(tariffs >= peak_thr)
+        off_peak_hours = np.flatnonzero(tariffs <= offpeak_thr)
+        off_charge_hours = off_peak_hours[off_peak_hours < len(battery)]
+        return (load[peak_hours].sum(), grid[peak_hours].sum(),
+                peak_hours[0] if peak_hours.size else -1,
+                peak_hours[-1] if peak_hours.size else -1,
+                np.clip(-battery, 0, None).sum(),
+                solar.sum(), np.minimum(solar, load).sum(),
+                np.maximum(battery[off_charge_hours], 0).sum(),
+                off_peak_hours[0] if off_peak_hours.size else -1,
+                off_peak_hours[-1] if off_peak_hours.size else -1)
+
+
 @dataclass
 class OptimizationResult:
     """優化結果資料結構"""
@@ -40,7 +127,7 @@ class TOUOptimizer:
     """
     時間電價優化器
     
-    使用 MILP 模型優化:
+    預設以貪婪啟發式排程 (method='greedy')，method='milp' 時使用 LP 模型 (strict_exclusivity 時為 MILP):
     - 電池充放電策略
     - 市電與綠電配比
     - 削峰填谷 (Peak Shaving)
@@ -54,23 +141,72 @@ class TOUOptimizer:
     - 能量平衡
     """
     
-    def __init__(self):
+    def __init__(self, gap_rel: Optional[float] = None, time_limit: Optional[float] = None):
+        """
+        Args:
+            gap_rel: MIP 相對間隙 (預設讀取 settings；0 表示求解至最佳)
+            time_limit: 求解時間上限 (秒，預設讀取 settings)
+        """
         self.battery_capacity = settings.battery_capacity_kwh  # kWh
         self.max_contract = settings.max_contract_capacity_kw  # kW
         self.battery_efficiency = settings.battery_efficiency
         self.min_soc = settings.min_soc
         self.max_soc = settings.max_soc
         self.time_horizon = settings.optimization_time_horizon  # hours
+        self.method = 'greedy'  # 'greedy' 啟發式 (純 NumPy) 或 'milp' (PuLP 模型)
+        self._solver = None  # 求解器實例 (首次求解時建立並重複使用)
+        self._solver_key: Optional[Tuple[Optional[float], float]] = None
+        
+        # 暖啟動：以上一次求解的變數值作為下一次求解的起始解
+        self.warm_start = True
+        self._last_solution: Dict[str, float] = {}
+        # MIP 相對間隙：短時域模型大部分時間花在證明最後 1% 的間隙，接受小間隙可大幅縮短求解；
+        # 情境模擬時可接受更大的間隙
+        self.mip_rel_gap: Optional[float] = (settings.optimization_mip_rel_gap
+                                             if gap_rel is None else gap_rel)
+        self.time_limit = settings.optimization_time_limit if time_limit is None else time_limit
+        self.scenario_mip_rel_gap = 0.05
+        self.renewable_credit = 0.8  # 綠電扣抵係數
+        self.cycle_penalty = 1e-4  # 充放電量的極小懲罰 (NTD/kWh)，打破退化解
         
         logger.info(f"TOUOptimizer initialized - Battery: {self.battery_capacity}kWh, "
                    f"Contract: {self.max_contract}kW")
     
+    def _get_solver(self):
+        """
+        取得求解器：優先使用 HiGHS 的 Python API (記憶體內傳遞模型，不寫 LP 檔、不啟動子程序)，
+        不可用時退回 CBC 命令列求解器；實例快取於優化器上供重複求解使用
+        """
+        key = (self.mip_rel_gap, self.time_limit)
+        if self._solver is None or self._solver_key != key:
+            threads = os.cpu_count()
+            solver = None
+            if _WarmStartHiGHS is not None:
+                solver = _WarmStartHiGHS(msg=False, timeLimit=self.time_limit,
+                                         gapRel=self.mip_rel_gap, threads=threads)
+            if solver is not None and solver.available():
+                logger.info("Using HiGHS in-memory solver")
+            else:
+                # 短時域模型：保留 presolve，關閉切平面與 strong branching 以減少每個節點的成本
+                solver = pulp.PULP_CBC_CMD(msg=0, timeLimit=self.time_limit,
+                                           gapRel=self.mip_rel_gap, threads=threads,
+                                           presolve=True, cuts=False, strong=0,
+                                           warmStart=True, keepFiles=False)
+                # CBC 需以 LP/SOL 檔案往返：有 tmpfs 時改寫到記憶體檔案系統，避免磁碟 I/O
+                if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+                    solver.tmpDir = '/dev/shm'
+            self._solver = solver
+            self._solver_key = key
+        return self._solver
+    
     def optimize(self, 
                  load_forecast: np.ndarray,
                  solar_forecast: np.ndarray,
                  wind_forecast: np.ndarray,
                  tariffs: np.ndarray,
-                 initial_soc: float = 0.5) -> OptimizationResult:
+                 initial_soc: float = 0.5,
+                 strict_exclusivity: bool = False,
+                 method: Optional[str] = None) -> OptimizationResult:
         """
         執行電力成本優化
         
@@ -80,10 +216,20 @@ class TOUOptimizer:
             wind_forecast: 風力預測 (kW)
             tariffs: 電價時序 (NTD/kWh)
             initial_soc: 初始電池狀態 (0-1)
+            strict_exclusivity: 是否以二元變數 (MILP) 強制充放電互斥；預設為純 LP (隱含 method='milp')
+            method: 'greedy' 或 'milp'，預設使用 self.method
             
         Returns:
             OptimizationResult
         """
+        load_forecast, solar_forecast, wind_forecast, tariffs = self._prepare_inputs(
+            load_forecast, solar_forecast, wind_forecast, tariffs)
+        method = 'milp' if strict_exclusivity else (method or self.method)
+        
+        if method == 'greedy':
+            return self._optimize_greedy(load_forecast, solar_forecast, wind_forecast,
+                                         tariffs, initial_soc)
+        
         if not PULP_AVAILABLE:
             logger.error("PuLP not available, returning baseline result")
             return self._baseline_result(load_forecast, solar_forecast, wind_forecast, tariffs)
@@ -92,110 +238,356 @@ class TOUOptimizer:
         
         logger.info(f"Starting optimization for {T} time periods")
         
+        solution = self._solve_window(load_forecast, solar_forecast, wind_forecast,
+                                      tariffs, initial_soc, strict_exclusivity)
+        
+        status = solution['status']
+        logger.info(f"Optimization status: {status}")
+        
+        if status != 'Optimal':
+            logger.warning(f"Optimization not optimal: {status}")
+            return self._baseline_result(load_forecast, solar_forecast, wind_forecast, tariffs)
+        
+        return self._build_result(load_forecast, solar_forecast, tariffs, solution)
+    
+    def optimize_rolling(self,
+                         load_forecast: np.ndarray,
+                         solar_forecast: np.ndarray,
+                         wind_forecast: np.ndarray,
+                         tariffs: np.ndarray,
+                         initial_soc: float = 0.5,
+                         window: int = 8,
+                         step: int = 4,
+                         strict_exclusivity: bool = False) -> OptimizationResult:
+        """
+        滾動時域 (rolling horizon) 優化
+        
+        將 T 期的單一模型拆成一連串長度 window 的小模型：每次只採用前 step 期的決策，
+        並以該期末的 SoC 作為下一個視窗的初始狀態；小模型求解遠快於整體模型，結果接近最佳
+        
+        Args:
+            load_forecast: 負載預測 (kW)
+            solar_forecast: 太陽能預測 (kW)
+            wind_forecast: 風力預測 (kW)
+            tariffs: 電價時序 (NTD/kWh)
+            initial_soc: 初始電池狀態 (0-1)
+            window: 每個子問題的時段數
+            step: 每次採用並前進的時段數 (<= window)
+            strict_exclusivity: 是否以二元變數 (MILP) 強制充放電互斥
+            
+        Returns:
+            OptimizationResult
+        """
+        load_forecast, solar_forecast, wind_forecast, tariffs = self._prepare_inputs(
+            load_forecast, solar_forecast, wind_forecast, tariffs)
+        
+        if not PULP_AVAILABLE:
+            logger.error("PuLP not available, returning baseline result")
+            return self._baseline_result(load_forecast, solar_forecast, wind_forecast, tariffs)
+        
+        T = len(load_forecast)
+        window = max(1, window)
+        step = max(1, min(step, window))
+        
+        logger.info(f"Starting rolling-horizon optimization for {T} time periods "
+                    f"(window={window}, step={step})")
+        
+        keys = ('grid', 'charge', 'discharge', 'solar', 'wind')
+        committed: Dict[str, List[float]] = {k: [] for k in keys}
+        soc_kwh = [self.battery_capacity * initial_soc]
+        soc = initial_soc
+        
+        for start in range(0, T, step):
+            end = min(start + window, T)
+            solution = self._solve_window(load_forecast[start:end], solar_forecast[start:end],
+                                          wind_forecast[start:end], tariffs[start:end], soc,
+                                          strict_exclusivity)
+            
+            if solution['status'] != 'Optimal':
+                logger.warning(f"Rolling window at t={start} not optimal: {solution['status']}")
+                return self._baseline_result(load_forecast, solar_forecast, wind_forecast, tariffs)
+            
+            # 只採用前 step 期的決策，其餘丟棄
+            n_commit = min(step, T - start)
+            for k in keys:
+                committed[k].extend(solution[k][:n_commit])
+            soc_kwh.extend(solution['soc'][1:n_commit + 1])
+            # 截斷至 SoC 上下限，避免求解器容差使下一個視窗的初始狀態不可行
+            soc = min(max(solution['soc'][n_commit] / self.battery_capacity, self.min_soc),
+                      self.max_soc)
+        
+        solution = {'status': 'Optimal', 'soc': soc_kwh, **committed}
+        return self._build_result(load_forecast, solar_forecast, tariffs, solution)
+    
+    @staticmethod
+    def _prepare_inputs(load_forecast, solar_forecast, wind_forecast, tariffs) -> Tuple[np.ndarray, ...]:
+        """
+        前後處理一律使用連續的 float32 陣列 (kW 與 NTD 的精度足夠，記憶體頻寬減半)；
+        電價為目標函數係數，保留 float64 傳入求解器
+        """
+        return (np.ascontiguousarray(load_forecast, dtype=np.float32),
+                np.ascontiguousarray(solar_forecast, dtype=np.float32),
+                np.ascontiguousarray(wind_forecast, dtype=np.float32),
+                np.ascontiguousarray(tariffs, dtype=np.float64))
+    
+    def _optimize_greedy(self,
+                         load_forecast: np.ndarray,
+                         solar_forecast: np.ndarray,
+                         wind_forecast: np.ndarray,
+                         tariffs: np.ndarray,
+                         initial_soc: float = 0.5) -> OptimizationResult:
+        """
+        貪婪啟發式排程 (純 NumPy，不需求解器)
+        
+        單一電池的時間電價套利可用門檻規則近似：綠電全數使用，依電價由高至低 (argsort) 逐一處理放電時段，
+        每個放電時段向前選取單位成本最低的電源 (剩餘綠電與電池初始存量成本為零，其次為最便宜的購電時段，
+        價差需大於往返效率損失)，並逐步更新 SoC 軌跡以維持 SoC 上下限、
+        每期充放電功率上限與合約容量 (尖峰時段為 80%)
+        
+        Returns:
+            OptimizationResult (status 為 'Heuristic')
+        """
+        load = np.asarray(load_forecast, dtype=np.float64)
+        tariffs = np.asarray(tariffs, dtype=np.float64)
+        solar = np.maximum(np.asarray(solar_forecast, dtype=np.float64), 0)
+        wind = np.maximum(np.asarray(wind_forecast, dtype=np.float64), 0)
+        T = len(load)
+        
+        logger.info(f"Starting greedy optimization for {T} time periods")
+        
+        eff = self.battery_efficiency
+        power_cap = self.battery_capacity * 0.5  # 每期充放電上限 (kW)
+        soc_min = self.battery_capacity * self.min_soc
+        soc_max = self.battery_capacity * self.max_soc
+        peak_thr = settings.summer_peak_rate * 0.9  # 尖峰時段門檻
+        grid_limit = np.where(tariffs >= peak_thr,
+                              self.max_contract * 0.8, self.max_contract)
+        
+        net = load - solar - wind  # 需由電網或電池供應的淨負載 (負值為剩餘綠電)
+        charge = np.zeros(T)
+        discharge = np.zeros(T)
+        soc = np.full(T + 1, self.battery_capacity * initial_soc)  # kWh
+        
+        # 以下 x 皆為 SoC 變化量 (kWh)：時段 c 充電 x/eff，時段 d 放電 x，可抵銷 d 的負載 x*eff
+        for d in np.argsort(-tariffs, kind='stable'):
+            while True:
+                residual = net + charge - discharge * eff  # 各時段仍需由電網供應的電量
+                demand = min(power_cap - discharge[d], residual[d] / eff)
+                if demand <= 1e-9:
+                    break
+                
+                # 電池初始存量：放電後 d 之後的 SoC 不得低於下限
+                stock = soc[d + 1:].min() - soc_min
+                
+                # d 之前的充電時段：[c+1, d] 區間的 SoC 不得超過上限
+                headroom = soc_max - np.maximum.accumulate(soc[d:0:-1])[::-1]
+                surplus = residual[:d] < 0
+                price = np.where(surplus, 0.0, tariffs[:d])
+                room = np.minimum.reduce([
+                    (power_cap - charge[:d]) * eff,
+                    (grid_limit[:d] - residual[:d]) * eff,
+                    headroom,
+                ])
+                candidates = np.flatnonzero((room > 1e-9) & (price < tariffs[d] * eff * eff))
+                
+                if candidates.size:
+                    # 成本最低者優先，同價時取最晚的時段 (保留較早的餘裕給其他放電時段)
+                    c = candidates[np.lexsort((-candidates, price[candidates]))[0]]
+                    if stock > 1e-9 and price[c] > 0:
+                        c = None
+                elif stock > 1e-9:
+                    c = None
+                else:
+                    break
+                
+                if c is None:
+                    x = min(demand, stock)
+                    discharge[d] += x
+                    soc[d + 1:] -= x
+                else:
+                    x = min(demand, room[c])
+                    if surplus[c]:
+                        x = min(x, -residual[c] * eff)
+                    charge[c] += x / eff
+                    discharge[d] += x
+                    soc[c + 1:d + 1] += x
+        
+        grid = np.maximum(net + charge - discharge * eff, 0)
+        if np.any(grid > grid_limit + 1e-6):
+            logger.warning("Greedy schedule exceeds the contract/peak limit in some periods")
+        
+        solution = {
+            'status': 'Heuristic',
+            'grid': grid,
+            'charge': charge,
+            'discharge': discharge,
+            'solar': solar,
+            'wind': wind,
+            'soc': soc
+        }
+        return self._build_result(load, solar_forecast, tariffs, solution)
+    
+    def _solve_window(self,
+                      load_forecast: np.ndarray,
+                      solar_forecast: np.ndarray,
+                      wind_forecast: np.ndarray,
+                      tariffs: np.ndarray,
+                      initial_soc: float,
+                      strict_exclusivity: bool = False) -> Dict[str, Any]:
+        """
+        建立並求解單一時段區間的優化模型 (預設為 LP，strict_exclusivity 時為 MILP)
+        
+        Returns:
+            求解狀態與各決策變數排程 (grid/charge/discharge/solar/wind 為 kW，soc 為 kWh，長度 T+1)
+        """
+        T = len(load_forecast)
+        
+        # 輸入一次轉為連續 float64 陣列，再轉為 Python float 串列供 PuLP 使用 (避免逐元素 NumPy 純量運算)
+        load = np.ascontiguousarray(load_forecast, dtype=np.float64).tolist()
+        solar = np.ascontiguousarray(solar_forecast, dtype=np.float64)
+        wind = np.ascontiguousarray(wind_forecast, dtype=np.float64)
+        tariffs = np.ascontiguousarray(tariffs, dtype=np.float64)
+        peak_thr = settings.summer_peak_rate * 0.9  # 尖峰時段門檻 (迴圈外計算一次)
+        peak_mask = tariffs >= peak_thr
+        solar_ub = np.maximum(solar, 0.001).tolist()
+        wind_ub = np.maximum(wind, 0.001).tolist()
+        solar_cap = np.maximum(solar, 0).tolist()
+        wind_cap = np.maximum(wind, 0).tolist()
+        
         # 建立優化問題
         prob = pulp.LpProblem("TOU_Optimization", pulp.LpMinimize)
         
-        # 決策變數
+        # 決策變數 (以 LpVariable.matrix 批次建立，名稱為 "<name>_<t>"，與暖啟動的鍵一致)
+        periods = range(T)
+        
         # 電網購電量 (kW)
-        grid_buy = [pulp.LpVariable(f"grid_buy_{t}", lowBound=0, upBound=self.max_contract) 
-                   for t in range(T)]
+        grid_buy = pulp.LpVariable.matrix("grid_buy", periods, lowBound=0, upBound=self.max_contract)
         
         # 電池充電量 (kW)
-        battery_charge = [pulp.LpVariable(f"battery_charge_{t}", lowBound=0, 
-                         upBound=self.battery_capacity * 0.5) for t in range(T)]
+        battery_charge = pulp.LpVariable.matrix("battery_charge", periods, lowBound=0,
+                                                upBound=self.battery_capacity * 0.5)
         
         # 電池放電量 (kW)
-        battery_discharge = [pulp.LpVariable(f"battery_discharge_{t}", lowBound=0,
-                            upBound=self.battery_capacity * 0.5) for t in range(T)]
+        battery_discharge = pulp.LpVariable.matrix("battery_discharge", periods, lowBound=0,
+                                                   upBound=self.battery_capacity * 0.5)
         
         # 電池狀態 (kWh)
-        soc = [pulp.LpVariable(f"soc_{t}", lowBound=self.battery_capacity * self.min_soc,
-               upBound=self.battery_capacity * self.max_soc) for t in range(T + 1)]
-        
-        # 太陽能使用量 (kW)
-        solar_used = [pulp.LpVariable(f"solar_used_{t}", lowBound=0, 
-                     upBound=max(solar_forecast[t], 0.001)) for t in range(T)]
-        
-        # 風力使用量 (kW)
-        wind_used = [pulp.LpVariable(f"wind_used_{t}", lowBound=0,
-                    upBound=max(wind_forecast[t], 0.001)) for t in range(T)]
+        soc = pulp.LpVariable.matrix("soc", range(T + 1),
+                                     lowBound=self.battery_capacity * self.min_soc,
+                                     upBound=self.battery_capacity * self.max_soc)
+        
+        # 太陽能、風力使用量 (kW)，上限為各期可用量
+        solar_used = pulp.LpVariable.matrix("solar_used", periods, lowBound=0)
+        wind_used = pulp.LpVariable.matrix("wind_used", periods, lowBound=0)
+        for var, ub in zip(solar_used, solar_ub):
+            var.upBound = ub
+        for var, ub in zip(wind_used, wind_ub):
+            var.upBound = ub
         
         # 目標函數: 最小化總電力成本
         # Cost = Σ(Grid_t × Tariff_t) - Σ(Renewable_t × Tariff_t × credit_factor)
-        renewable_credit = 0.8  # 綠電扣抵係數
+        renewable_credit = self.renewable_credit
         
-        prob += pulp.lpSum([
-            grid_buy[t] * tariffs[t] - 
-            (solar_used[t] + wind_used[t]) * tariffs[t] * renewable_credit
-            for t in range(T)
-        ])
+        # 以係數陣列 lpDot 一次建立目標式；充放電量加上極小懲罰，打破同時充放電的退化解 (不計入回報的成本)
+        credit = (-tariffs * renewable_credit).tolist()
+        prob += (pulp.lpDot(grid_buy, tariffs.tolist()) +
+                 pulp.lpDot(solar_used, credit) +
+                 pulp.lpDot(wind_used, credit) +
+                 pulp.lpDot(battery_charge + battery_discharge, [self.cycle_penalty] * (2 * T)))
         
-        # 約束條件
+        # 約束條件 (先建好所有約束再以 extend 一次加入)
+        efficiency = self.battery_efficiency
         
         # 1. 能量平衡: 負載 = 電網 + 太陽能 + 風力 + 電池放電 - 電池充電
-        for t in range(T):
-            prob += (grid_buy[t] + solar_used[t] + wind_used[t] + 
-                    battery_discharge[t] * self.battery_efficiency - 
-                    battery_charge[t] >= load_forecast[t])
+        constraints = [
+            grid_buy[t] + solar_used[t] + wind_used[t] +
+            battery_discharge[t] * efficiency - battery_charge[t] >= load[t]
+            for t in range(T)
+        ]
         
         # 2. 電池 SoC 動態
-        prob += soc[0] == self.battery_capacity * initial_soc
-        
-        for t in range(T):
-            prob += soc[t + 1] == (soc[t] + 
-                                  battery_charge[t] * self.battery_efficiency - 
-                                  battery_discharge[t])
+        constraints.append(soc[0] == self.battery_capacity * initial_soc)
+        constraints.extend(
+            soc[t + 1] == soc[t] + battery_charge[t] * efficiency - battery_discharge[t]
+            for t in range(T)
+        )
         
         # 3. 太陽能和風力使用不超過可用量
-        for t in range(T):
-            prob += solar_used[t] <= max(solar_forecast[t], 0)
-            prob += wind_used[t] <= max(wind_forecast[t], 0)
+        constraints.extend(solar_used[t] <= solar_cap[t] for t in range(T))
+        constraints.extend(wind_used[t] <= wind_cap[t] for t in range(T))
         
-        # 4. 充放電互斥 (簡化處理 - 用大 M 法)
-        M = self.battery_capacity * 2
-        charge_flag = [pulp.LpVariable(f"charge_flag_{t}", cat='Binary') for t in range(T)]
+        prob.extend(constraints)
         
-        for t in range(T):
-            prob += battery_charge[t] <= M * charge_flag[t]
-            prob += battery_discharge[t] <= M * (1 - charge_flag[t])
+        # 4. 充放電互斥：充放電效率 < 1 時同時充放電只會損失能量，LP 最佳解自然不會同時發生；
+        #    需要嚴格保證時才加入大 M 二元變數 (問題轉為 MILP，需分支定界)
+        if strict_exclusivity:
+            M = self.battery_capacity * 2
+            charge_flag = pulp.LpVariable.matrix("charge_flag", periods, cat='Binary')
+            
+            for t in range(T):
+                prob += battery_charge[t] <= M * charge_flag[t]
+                prob += battery_discharge[t] <= M * (1 - charge_flag[t])
         
         # 5. 削峰約束 - 尖峰時段限制電網購電
         peak_limit = self.max_contract * 0.8  # 尖峰時段限制在 80%
-        for t in range(T):
-            if tariffs[t] >= settings.summer_peak_rate * 0.9:  # 尖峰時段
-                prob += grid_buy[t] <= peak_limit
+        prob.extend([grid_buy[t] <= peak_limit for t in np.nonzero(peak_mask)[0]])
         
         # 求解
-        solver = pulp.PULP_CBC_CMD(msg=0, timeLimit=60)
-        prob.solve(solver)
+        # 暖啟動：同名變數沿用上一次的解作為初始值 (情境間上下限可能改變，先截斷至邊界內)
+        if self.warm_start and self._last_solution:
+            for var in prob.variables():
+                value = self._last_solution.get(var.name)
+                if value is None:
+                    continue
+                if var.lowBound is not None:
+                    value = max(value, var.lowBound)
+                if var.upBound is not None:
+                    value = min(value, var.upBound)
+                var.setInitialValue(value)
+        
+        prob.solve(self._get_solver())
         
         status = pulp.LpStatus[prob.status]
-        logger.info(f"Optimization status: {status}")
-        
         if status != 'Optimal':
-            logger.warning(f"Optimization not optimal: {status}")
-            return self._baseline_result(load_forecast, solar_forecast, wind_forecast, tariffs)
+            return {'status': status}
+        
+        self._last_solution = {var.name: var.varValue for var in prob.variables()
+                               if var.varValue is not None}
         
         # 提取結果
-        grid_schedule = [grid_buy[t].varValue or 0 for t in range(T)]
-        charge_schedule = [battery_charge[t].varValue or 0 for t in range(T)]
-        discharge_schedule = [battery_discharge[t].varValue or 0 for t in range(T)]
-        solar_schedule = [solar_used[t].varValue or 0 for t in range(T)]
-        wind_schedule = [wind_used[t].varValue or 0 for t in range(T)]
-        soc_schedule = [(soc[t].varValue or 0) / self.battery_capacity for t in range(T + 1)]
+        return {
+            'status': status,
+            'grid': [grid_buy[t].varValue or 0 for t in range(T)],
+            'charge': [battery_charge[t].varValue or 0 for t in range(T)],
+            'discharge': [battery_discharge[t].varValue or 0 for t in range(T)],
+            'solar': [solar_used[t].varValue or 0 for t in range(T)],
+            'wind': [wind_used[t].varValue or 0 for t in range(T)],
+            'soc': [soc[t].varValue or 0 for t in range(T + 1)]
+        }
+    
+    def _build_result(self, load_forecast: np.ndarray, solar_forecast: np.ndarray,
+                      tariffs: np.ndarray, solution: Dict[str, Any]) -> OptimizationResult:
+        """由求解得到的排程計算成本、削峰效果與建議"""
+        load_forecast = np.asarray(load_forecast, dtype=np.float32)
+        tariffs = np.asarray(tariffs, dtype=np.float64)
+        grid_schedule = np.asarray(solution['grid'], dtype=np.float32)
+        solar_schedule = np.asarray(solution['solar'], dtype=np.float32)
+        wind_schedule = np.asarray(solution['wind'], dtype=np.float32)
         
         # 電池淨充放電 (正=充電, 負=放電)
-        battery_schedule = [charge_schedule[t] - discharge_schedule[t] for t in range(T)]
+        battery_schedule = (np.asarray(solution['charge'], dtype=np.float32) -
+                            np.asarray(solution['discharge'], dtype=np.float32))
         
-        # 計算成本
-        total_cost = pulp.value(prob.objective)
-        baseline_cost = sum(load_forecast[t] * tariffs[t] for t in range(T))
+        # 計算成本 (與目標函數相同的成本定義；排程為 float32，與 float64 電價相乘時以 float64 累加)
+        total_cost = float(grid_schedule @ tariffs -
+                           (solar_schedule + wind_schedule) @ tariffs * self.renewable_credit)
+        baseline_cost = float(load_forecast @ tariffs)
         savings = baseline_cost - total_cost
         savings_percent = (savings / baseline_cost * 100) if baseline_cost > 0 else 0
         
         # 計算削峰效果
-        baseline_peak = max(load_forecast)
-        optimized_peak = max(grid_schedule)
+        baseline_peak = load_forecast.max()
+        optimized_peak = grid_schedule.max()
         peak_reduction = ((baseline_peak - optimized_peak) / baseline_peak * 100 
                          if baseline_peak > 0 else 0)
         
@@ -208,15 +600,15 @@ class TOUOptimizer:
         logger.info(f"Optimization complete - Savings: {savings:.2f} NTD ({savings_percent:.1f}%)")
         
         return OptimizationResult(
-            status=status,
+            status=solution['status'],
             total_cost=total_cost,
             baseline_cost=baseline_cost,
             savings=savings,
             savings_percent=savings_percent,
-            battery_schedule=battery_schedule,
-            grid_consumption=grid_schedule,
-            solar_utilization=solar_schedule,
-            peak_reduction=peak_reduction,
+            battery_schedule=battery_schedule.tolist(),
+            grid_consumption=grid_schedule.tolist(),
+            solar_utilization=solar_schedule.tolist(),
+            peak_reduction=float(peak_reduction),
             recommendations=recommendations
         )
     
@@ -224,8 +616,11 @@ class TOUOptimizer:
                         wind_forecast: np.ndarray, tariffs: np.ndarray) -> OptimizationResult:
         """生成基準結果（無優化）"""
         T = len(load_forecast)
-        net_load = np.maximum(load_forecast - solar_forecast - wind_forecast, 0)
-        baseline_cost = sum(net_load[t] * tariffs[t] for t in range(T))
+        load_forecast = np.asarray(load_forecast, dtype=np.float32)
+        solar_forecast = np.asarray(solar_forecast, dtype=np.float32)
+        net_load = np.maximum(load_forecast - solar_forecast -
+                              np.asarray(wind_forecast, dtype=np.float32), 0)
+        baseline_cost = float(net_load @ np.asarray(tariffs, dtype=np.float64))
         
         return OptimizationResult(
             status="Baseline",
@@ -234,8 +629,8 @@ class TOUOptimizer:
             savings=0,
             savings_percent=0,
             battery_schedule=[0] * T,
-            grid_consumption=list(net_load),
-            solar_utilization=list(np.minimum(solar_forecast, load_forecast)),
+            grid_consumption=net_load.tolist(),
+            solar_utilization=np.minimum(solar_forecast, load_forecast).tolist(),
             peak_reduction=0,
             recommendations=["建議安裝儲能系統以實現成本優化"]
         )
@@ -245,28 +640,35 @@ class TOUOptimizer:
                                   tariffs: np.ndarray, peak_reduction: float) -> List[str]:
         """生成優化建議"""
         recommendations = []
+        load = np.asarray(load, dtype=np.float32)
+        solar = np.asarray(solar, dtype=np.float32)
+        grid = np.asarray(grid, dtype=np.float32)
+        battery = np.asarray(battery, dtype=np.float32)
+        tariffs = np.asarray(tariffs, dtype=np.float64)
+        peak_thr = settings.summer_peak_rate * 0.9
+        offpeak_thr = settings.summer_off_peak_rate * 1.1
+        
+        # 數值統計由 _reco_stats 一次算完 (有 numba 時為 JIT 編譯的單次迴圈)，此處只負責組字串
+        (peak_load, peak_grid, first_peak, last_peak, total_discharge,
+         solar_available, solar_used, off_peak_charge, first_off_peak, last_off_peak) = _reco_stats(
+            load, solar, grid, battery, tariffs, peak_thr, offpeak_thr
+        )
         
         # 1. 尖峰時段建議
-        peak_hours = [i for i, t in enumerate(tariffs) if t >= settings.summer_peak_rate * 0.9]
-        if peak_hours:
-            peak_load = sum(load[h] for h in peak_hours)
-            peak_grid = sum(grid[h] for h in peak_hours)
+        if first_peak >= 0:
             if peak_grid < peak_load * 0.8:
                 recommendations.append(
-                    f"尖峰時段({peak_hours[0]}:00-{peak_hours[-1]+1}:00)成功減少"
+                    f"尖峰時段({first_peak}:00-{last_peak+1}:00)成功減少"
                     f"{((peak_load - peak_grid) / peak_load * 100):.1f}%電網用電"
                 )
         
         # 2. 電池使用建議
-        total_discharge = sum(max(-b, 0) for b in battery)
         if total_discharge > 0:
             recommendations.append(
                 f"電池在尖峰時段提供 {total_discharge:.1f} kWh 電力，有效降低尖峰需量"
             )
         
         # 3. 太陽能利用建議
-        solar_available = sum(solar)
-        solar_used = sum(min(s, l) for s, l in zip(solar, load))
         if solar_available > 0:
             utilization = solar_used / solar_available * 100
             recommendations.append(
@@ -281,12 +683,10 @@ class TOUOptimizer:
             )
         
         # 5. 離峰充電建議
-        off_peak_hours = [i for i, t in enumerate(tariffs) if t <= settings.summer_off_peak_rate * 1.1]
-        if off_peak_hours:
-            off_peak_charge = sum(max(battery[h], 0) for h in off_peak_hours if h < len(battery))
+        if first_off_peak >= 0:
             if off_peak_charge > 0:
                 recommendations.append(
-                    f"建議在離峰時段({off_peak_hours[0]}:00-{off_peak_hours[-1]+1}:00)"
+                    f"建議在離峰時段({first_off_peak}:00-{last_off_peak+1}:00)"
                     f"進行電池充電，充電量 {off_peak_charge:.1f} kWh"
                 )
         
@@ -305,34 +705,47 @@ class TOUOptimizer:
             優化結果和排程
         """
         # 準備輸入資料 (注意：原始資料是 MW 單位，代表系統級別)
-        load_raw = forecast_df['predicted_load_mw'].values if 'predicted_load_mw' in forecast_df.columns else np.zeros(len(forecast_df))
-        solar_raw = forecast_df['predicted_solar_mw'].values if 'predicted_solar_mw' in forecast_df.columns else np.zeros(len(forecast_df))
-        wind_raw = forecast_df['predicted_wind_mw'].values if 'predicted_wind_mw' in forecast_df.columns else np.zeros(len(forecast_df))
-        tariffs = forecast_df['tariff'].values if 'tariff' in forecast_df.columns else np.full(len(forecast_df), 5.0)
+        # to_numpy(copy=False) 在型別相同時直接取得底層陣列；負載與綠電以 float32 處理，電價保留 float64
+        T = len(forecast_df)
+        columns = forecast_df.columns
+        zeros = np.zeros(T, dtype=np.float32)
+        load_raw = forecast_df['predicted_load_mw'].to_numpy(dtype=np.float32, copy=False) if 'predicted_load_mw' in columns else zeros
+        solar_raw = forecast_df['predicted_solar_mw'].to_numpy(dtype=np.float32, copy=False) if 'predicted_solar_mw' in columns else zeros
+        wind_raw = forecast_df['predicted_wind_mw'].to_numpy(dtype=np.float32, copy=False) if 'predicted_wind_mw' in columns else zeros
+        tariffs = forecast_df['tariff'].to_numpy(dtype=np.float64, copy=False) if 'tariff' in columns else np.full(T, 5.0)
         
         # 縮放到企業規模
         # 假設企業用電約佔系統總負載的 0.0001% (約 20 kW ~ 300 kW 範圍)
         # 使負載峰值約為合約容量的 80%
         load_max_mw = np.max(load_raw) if np.max(load_raw) > 0 else 1
         target_peak_kw = self.max_contract * 0.8  # 目標峰值約 400 kW
-        scale_factor = target_peak_kw / (load_max_mw * 1000)  # MW 轉 kW 並縮放
+        scale_factor = np.float32(target_peak_kw / (load_max_mw * 1000))  # MW 轉 kW 並縮放
         
-        load = load_raw * 1000 * scale_factor  # 轉換並縮放
-        solar = solar_raw * 1000 * scale_factor
-        wind = wind_raw * 1000 * scale_factor
+        load = load_raw * np.float32(1000) * scale_factor  # 轉換並縮放
+        solar = solar_raw * np.float32(1000) * scale_factor
+        wind = wind_raw * np.float32(1000) * scale_factor
         
         logger.info(f"Load scaled: max {np.max(load):.1f} kW, avg {np.mean(load):.1f} kW")
         
         # 執行優化
         result = self.optimize(load, solar, wind, tariffs, initial_soc)
         
-        # 建立優化排程 DataFrame
-        schedule_df = forecast_df.copy()
-        schedule_df['optimized_grid_kw'] = result.grid_consumption
-        schedule_df['battery_schedule_kw'] = result.battery_schedule
-        schedule_df['solar_used_kw'] = result.solar_utilization
-        schedule_df['baseline_cost'] = load * tariffs
-        schedule_df['optimized_cost'] = np.array(result.grid_consumption) * tariffs
+        # 建立優化排程 DataFrame：新欄位一次建好後與原資料合併 (不複製整個 forecast_df 再逐欄指派)
+        grid = np.fromiter(result.grid_consumption, dtype=np.float32, count=T)
+        tariffs_f32 = tariffs.astype(np.float32)
+        baseline_cost = load * tariffs_f32
+        optimized_cost = grid * tariffs_f32
+        schedule_cols = pd.DataFrame({
+            'optimized_grid_kw': grid,
+            'battery_schedule_kw': np.asarray(result.battery_schedule, dtype=np.float32),
+            'solar_used_kw': np.asarray(result.solar_utilization, dtype=np.float32),
+            'baseline_cost': baseline_cost,
+            'optimized_cost': optimized_cost
+        }, index=forecast_df.index)
+        # 重複優化同一份排程時，以新結果取代舊欄位
+        overlap = columns.intersection(schedule_cols.columns)
+        base_df = forecast_df.drop(columns=overlap) if len(overlap) else forecast_df
+        schedule_df = pd.concat([base_df, schedule_cols], axis=1)
         
         return {
             'result': result,
@@ -348,19 +761,46 @@ class TOUOptimizer:
         }
     
     def simulate_scenarios(self, forecast_df: pd.DataFrame, 
-                          scenarios: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                          scenarios: List[Dict[str, Any]],
+                          parallel: bool = False,
+                          max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         模擬不同情境
         
         Args:
             forecast_df: 預測資料
             scenarios: 情境列表，每個情境包含不同的參數設定
+            parallel: 是否以多個行程並行求解各情境 (僅 method='milp' 時生效；
+                      貪婪法求解遠快於行程池啟動成本，一律依序執行)
+            max_workers: 並行行程數上限 (預設為 CPU 核心數)
             
         Returns:
             各情境的優化結果
         """
+        if parallel and self.method == 'milp' and len(scenarios) > 1:
+            # 各情境為獨立的優化問題：每個行程取得 self 設定的副本，不修改 self 的參數；
+            # 求解器實例與暖啟動解不可跨行程共用，副本中清除
+            template = copy.copy(self)
+            template._solver = None
+            template._solver_key = None
+            template._last_solution = {}
+            template.mip_rel_gap = self.scenario_mip_rel_gap
+            
+            n_workers = min(len(scenarios), max_workers or os.cpu_count() or 1)
+            logger.info(f"Simulating {len(scenarios)} scenarios with {n_workers} processes")
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = [
+                    executor.submit(_run_scenario, i, scenario, forecast_df, template)
+                    for i, scenario in enumerate(scenarios)
+                ]
+                return [future.result() for future in futures]
+        
         results = []
         
+        # 情境間只改變容量參數，最佳解變動不大：暖啟動並接受較大的 MIP 間隙
+        original_gap = self.mip_rel_gap
+        self.mip_rel_gap = self.scenario_mip_rel_gap
+        
         for i, scenario in enumerate(scenarios):
             logger.info(f"Simulating scenario {i + 1}: {scenario.get('name', 'Unnamed')}")
             
@@ -388,4 +828,31 @@ class TOUOptimizer:
             self.battery_capacity = original_capacity
             self.max_contract = original_contract
         
+        self.mip_rel_gap = original_gap
+        
         return results
+
+
+def _run_scenario(index: int, scenario: Dict[str, Any], forecast_df: pd.DataFrame,
+                  optimizer: 'TOUOptimizer') -> Dict[str, Any]:
+    """
+    在獨立行程中求解單一情境 (模組層級函式，可被 ProcessPoolExecutor pickle)
+    
+    optimizer 為呼叫端設定的 pickle 副本，保留所有求解參數，僅覆寫情境指定的容量
+    """
+    logger.info(f"Simulating scenario {index + 1}: {scenario.get('name', 'Unnamed')}")
+    
+    optimizer.battery_capacity = scenario.get('battery_capacity', optimizer.battery_capacity)
+    optimizer.max_contract = scenario.get('max_contract', optimizer.max_contract)
+    
+    opt_result = optimizer.optimize_schedule(
+        forecast_df,
+        initial_soc=scenario.get('initial_soc', 0.5)
+    )
+    
+    return {
+        'scenario': scenario.get('name', f'Scenario_{index + 1}'),
+        'battery_capacity': optimizer.battery_capacity,
+        'max_contract': optimizer.max_contract,
+        'result': opt_result
+    }
@@ -2,16 +2,25 @@
 Helper utilities for EcoGrid system
 """
 
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
-import torch
 from loguru import logger
 
+try:
+    import pynvml
+    PYNVML_AVAILABLE = True
+except ImportError:
+    PYNVML_AVAILABLE = False
+
 from ecogrid.config.settings import settings
 
+# NVML 裝置 handle：首次查詢時初始化一次並快取 (None 表示尚未初始化，False 表示不可用)
+_nvml_handle = None
+
 
 def setup_logging(log_level: Optional[str] = None, log_file: bool = True):
     """
@@ -52,31 +61,79 @@ def setup_logging(log_level: Optional[str] = None, log_file: bool = True):
     logger.info(f"Logging initialized at level {level}")
 
 
+def _get_nvml_handle():
+    """
+    取得 torch CUDA 裝置 0 對應的 NVML handle (只初始化一次)；無法確定對應關係時回傳 None
+    
+    NVML 依 PCI 匯流排列舉所有實體 GPU，不受 CUDA_VISIBLE_DEVICES 影響，
+    僅在 torch 可使用 CUDA 且能由 CUDA_VISIBLE_DEVICES / CUDA_DEVICE_ORDER 確定對應的實體 GPU 時使用
+    """
+    global _nvml_handle
+    if _nvml_handle is None:
+        _nvml_handle = False
+        import torch  # 延遲匯入：只有需要查詢 GPU 時才載入 torch
+        if PYNVML_AVAILABLE and torch.cuda.is_available():
+            visible = os.environ.get('CUDA_VISIBLE_DEVICES', '0').split(',')[0].strip()
+            pci_order = os.environ.get('CUDA_DEVICE_ORDER') == 'PCI_BUS_ID'
+            try:
+                pynvml.nvmlInit()
+                if visible.startswith('GPU-'):
+                    _nvml_handle = pynvml.nvmlDeviceGetHandleByUUID(visible)
+                elif visible.isdigit() and (pci_order or pynvml.nvmlDeviceGetCount() == 1):
+                    _nvml_handle = pynvml.nvmlDeviceGetHandleByIndex(int(visible))
+            except pynvml.NVMLError as e:
+                logger.debug(f"NVML unavailable: {e}")
+    return _nvml_handle or None
+
+
+def _gpu_memory() -> Optional[tuple]:
+    """
+    torch CUDA 裝置 0 的記憶體用量 (bytes)：可對應時以 NVML 查詢，不需建立 CUDA context
+    
+    Returns:
+        (total, used, free)，無 GPU 時為 None
+    """
+    import torch
+    if not torch.cuda.is_available():
+        return None
+    
+    handle = _get_nvml_handle()
+    if handle is not None:
+        mem = pynvml.nvmlDeviceGetMemoryInfo(handle)
+        return mem.total, mem.used, mem.free
+    
+    free, total = torch.cuda.mem_get_info(0)
+    return total, total - free, free
+
+
 def get_device_info() -> dict:
     """
     獲取計算設備資訊
     
     Returns:
-        設備資訊字典
+        設備資訊字典 (記憶體欄位為 bytes 整數，由呼叫端在顯示時格式化)
     """
     info = {
-        "cuda_available": torch.cuda.is_available(),
-        "device_count": torch.cuda.device_count() if torch.cuda.is_available() else 0,
+        "cuda_available": False,
+        "device_count": 0,
         "current_device": None,
         "device_name": None,
-        "memory_allocated": None,
-        "memory_reserved": None,
+        "memory_used": None,
+        "memory_free": None,
         "memory_total": None
     }
     
+    # 可用性以 torch 為準 (CPU 版 torch 或 CUDA_VISIBLE_DEVICES 隱藏 GPU 時不可用)，NVML 只用於記憶體數值
+    import torch
     if torch.cuda.is_available():
+        info["cuda_available"] = True
+        info["device_count"] = torch.cuda.device_count()
         info["current_device"] = torch.cuda.current_device()
         info["device_name"] = torch.cuda.get_device_name(0)
-        info["memory_allocated"] = f"{torch.cuda.memory_allocated(0) / 1024**3:.2f} GB"
-        info["memory_reserved"] = f"{torch.cuda.memory_reserved(0) / 1024**3:.2f} GB"
-        
-        total_memory = torch.cuda.get_device_properties(0).total_memory
-        info["memory_total"] = f"{total_memory / 1024**3:.2f} GB"
+    
+    memory = _gpu_memory() if info["cuda_available"] else None
+    if memory is not None:
+        info["memory_total"], info["memory_used"], info["memory_free"] = memory
     
     return info
 
@@ -131,11 +188,19 @@ def create_directories():
         logger.debug(f"Directory ensured: {dir_path}")
 
 
-def clear_gpu_memory():
-    """清理 GPU 記憶體"""
+def clear_gpu_memory(synchronize: bool = False):
+    """
+    清理 GPU 記憶體
+    
+    Args:
+        synchronize: 是否先等待所有 GPU 運算完成 (全裝置同步會阻塞 CPU，預設不做；
+            empty_cache 本身只回收已完成串流的區塊，不需同步)
+    """
+    import torch
     if torch.cuda.is_available():
+        if synchronize:
+            torch.cuda.synchronize()
         torch.cuda.empty_cache()
-        torch.cuda.synchronize()
         logger.info("GPU memory cleared")
 
 
@@ -149,11 +214,11 @@ def check_gpu_memory(threshold_gb: float = 1.0) -> bool:
     Returns:
         是否足夠
     """
-    if not torch.cuda.is_available():
+    memory = _gpu_memory()
+    if memory is None:
         return False
     
-    free_memory = torch.cuda.get_device_properties(0).total_memory - torch.cuda.memory_allocated(0)
-    free_gb = free_memory / 1024**3
+    free_gb = memory[2] / 1024**3
     
     if free_gb < threshold_gb:
         logger.warning(f"Low GPU memory: {free_gb:.2f} GB available")
@@ -3,14 +3,97 @@ EcoGrid Audit Predict - API 測試腳本
 測試 FastAPI Backend 所有端點
 """
 
-import requests
+import asyncio
 import json
+import os
+import sys
 import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, Any
 
-# API 基礎 URL
-BASE_URL = "http://localhost:8000/api/v1"
+import httpx
+import numpy as np
+
+# JSON 序列化：有 orjson 時使用（較標準庫 json 快），否則退回 json.dumps
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 串流 JSON 解析為選用功能（需安裝 ijson）
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Backend / Ollama 位址與 API 基礎 URL（直接使用 127.0.0.1，省去 localhost 名稱解析）
+BACKEND_ORIGIN = "http://127.0.0.1:8000"
+OLLAMA_ORIGIN = "http://127.0.0.1:11434"
+BASE_URL = BACKEND_ORIGIN + "/api/v1"
+
+# Backend 另以 --uds 監聽 UNIX domain socket 時，改走 socket 以略過 loopback TCP
+UDS_PATH = os.environ.get("ECOGRID_UDS", "/tmp/ecogrid.sock")
+USE_UDS = os.path.exists(UDS_PATH)
+
+# 任務狀態查詢 URL 模板
+FORECAST_STATUS_URL = BASE_URL + "/forecast/predict/{}"
+OPTIMIZE_STATUS_URL = BASE_URL + "/optimization/optimize/{}"
+AUDIT_STATUS_URL = BASE_URL + "/audit/generate/{}"
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def dumps_json(payload) -> bytes:
+    """將請求內容預先序列化為 JSON bytes（略過 HTTP client 內部的 json.dumps）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def loads_json(response):
+    """直接從回應的原始 bytes 解析 JSON（有 orjson 時使用，略過編碼偵測）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+@lru_cache(maxsize=1)
+def audit_date_range(days: int = 7):
+    """審計報告的日期範圍（最近 N 天，ISO 格式；同一次執行只計算一次）"""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    return start_date.isoformat(), end_date.isoformat()
+
+def create_client() -> httpx.AsyncClient:
+    """建立共用的非同步 HTTP Client（單一連線池 + keep-alive，所有測試協程共用）"""
+    # 傳入 transport 時 AsyncClient 會忽略 limits，連線池上限須設定在 transport 上；
+    # 本機服務皆為明文 HTTP/1.1 (uvicorn 不支援 h2c)，不啟用 HTTP/2
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=20)
+    
+    # 只有 Backend 走 UNIX socket，Ollama 等其他服務仍使用 TCP
+    mounts = {}
+    if USE_UDS:
+        mounts[BACKEND_ORIGIN] = httpx.AsyncHTTPTransport(uds=UDS_PATH, retries=2, limits=limits)
+    
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(60.0),
+        transport=httpx.AsyncHTTPTransport(retries=2, limits=limits),
+        headers={"Accept": "application/json"},
+        trust_env=False,  # 只連本機服務，不需讀取 proxy 等環境設定
+        mounts=mounts
+    )
+
+# 位元組換算 GB
+_GB = 1 << 30
+
+# LLM 測試所需的 Ollama 模型（不含 tag）
+REQUIRED_MODELS = ('llama3.2',)
+
+# 長輪詢：每次請求由伺服器最多保留的秒數
+LONG_POLL_WAIT = 30
+
+# 進度列格式：\r 回到行首，\x1b[K 清除行尾殘字
+PROGRESS_FMT = "\r進度: {:5.1f}% - 狀態: {}\x1b[K"
 
 # 顏色輸出
 class Colors:
@@ -20,64 +103,178 @@ class Colors:
     BLUE = '\033[94m'
     RESET = '\033[0m'
 
-def print_success(msg: str):
+def detect_color_support() -> bool:
+    """啟動時偵測一次終端機是否支援 ANSI 顏色（非 TTY、dumb 終端或寫入失敗時停用）"""
+    if not sys.stdout.isatty() or os.environ.get("TERM") == "dumb":
+        return False
     try:
-        print(f"{Colors.GREEN}[OK] {msg}{Colors.RESET}")
-    except:
-        print(f"[OK] {msg}")
+        sys.stdout.write(Colors.RESET)
+        sys.stdout.flush()
+    except Exception:
+        return False
+    return True
+
+USE_COLOR = detect_color_support()
+
+# 依偵測結果預先組好的前綴，每次輸出只需一次字串組合
+if USE_COLOR:
+    _OK_PREFIX = f"{Colors.GREEN}[OK] "
+    _ERROR_PREFIX = f"{Colors.RED}[ERROR] "
+    _INFO_PREFIX = f"{Colors.BLUE}[INFO] "
+    _WARNING_PREFIX = f"{Colors.YELLOW}[WARNING] "
+    _PASS_PREFIX = f"{Colors.GREEN}[PASS]{Colors.RESET}"
+    _FAIL_PREFIX = f"{Colors.RED}[FAIL]{Colors.RESET}"
+    _RESET = Colors.RESET
+else:
+    _OK_PREFIX = "[OK] "
+    _ERROR_PREFIX = "[ERROR] "
+    _INFO_PREFIX = "[INFO] "
+    _WARNING_PREFIX = "[WARNING] "
+    _PASS_PREFIX = "[PASS]"
+    _FAIL_PREFIX = "[FAIL]"
+    _RESET = ""
+
+def print_success(msg: str):
+    print(f"{_OK_PREFIX}{msg}{_RESET}")
 
 def print_error(msg: str):
-    try:
-        print(f"{Colors.RED}[ERROR] {msg}{Colors.RESET}")
-    except:
-        print(f"[ERROR] {msg}")
+    print(f"{_ERROR_PREFIX}{msg}{_RESET}")
 
 def print_info(msg: str):
-    try:
-        print(f"{Colors.BLUE}[INFO] {msg}{Colors.RESET}")
-    except:
-        print(f"[INFO] {msg}")
+    print(f"{_INFO_PREFIX}{msg}{_RESET}")
 
 def print_warning(msg: str):
-    try:
-        print(f"{Colors.YELLOW}[WARNING] {msg}{Colors.RESET}")
-    except:
-        print(f"[WARNING] {msg}")
+    print(f"{_WARNING_PREFIX}{msg}{_RESET}")
 
-def test_server_health():
-    """測試伺服器是否運行"""
+def print_header(title: str):
     print("\n" + "="*60)
-    print("測試 1: 伺服器健康檢查")
+    print(title)
     print("="*60)
+
+def preview_text(text: str, limit: int = 500) -> str:
+    """截取前 limit 個字元作為預覽（超過時加上 ...）"""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def print_block(text: str):
+    print("-" * 60)
+    print(text)
+    print("-" * 60)
+
+async def wait_for_task(client: httpx.AsyncClient, status_url: str, max_wait: float):
+    """
+    以長輪詢等待背景任務結束
+    
+    伺服器保留請求直到任務完成/失敗或 wait 秒到期才回應，等待期間事件迴圈可處理其他測試；
+    讀取逾時時直接重新發出請求，整體等待以 max_wait 秒為上限
+    
+    Returns:
+        任務結束時的狀態資料；查詢失敗或逾時為 None
+    """
+    deadline = time.monotonic() + max_wait
+    last_progress, last_status = -1, None
+    headers = {}
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print()  # 換行
+            print_warning("任務超時")
+            return None
+        
+        wait = min(LONG_POLL_WAIT, remaining)
+        try:
+            status_response = await client.get(
+                status_url,
+                params={"wait": wait},
+                headers=headers,
+                timeout=wait + 5
+            )
+        except httpx.ReadTimeout:
+            continue  # 連線被中斷，重新發出長輪詢
+        
+        if status_response.status_code == 304:
+            continue  # 狀態未變（ETag 相同），不需解析 JSON
+        
+        if status_response.status_code != 200:
+            print_error(f"查詢狀態失敗: {status_response.status_code}")
+            return None
+        
+        etag = status_response.headers.get("ETag")
+        if etag:
+            headers = {"If-None-Match": etag}
+        
+        status_data = loads_json(status_response)
+        status = status_data.get('status')
+        progress = status_data.get('progress', 0)
+        
+        # 只在進度整數或狀態變化時才更新進度列
+        if (int(progress), status) != (last_progress, last_status):
+            last_progress, last_status = int(progress), status
+            sys.stdout.flush()  # 先清空文字層緩衝，確保輸出順序
+            sys.stdout.buffer.write(PROGRESS_FMT.format(progress, status).encode('utf-8'))
+            sys.stdout.buffer.flush()
+        
+        if status in ('completed', 'failed'):
+            print()  # 換行
+            return status_data
+
+async def test_server_health(client: httpx.AsyncClient):
+    """測試伺服器是否運行"""
+    print_header("測試 1: 伺服器健康檢查")
     
     try:
-        response = requests.get(f"http://localhost:8000/docs", timeout=5)
+        response = await client.get(f"{BACKEND_ORIGIN}/docs", timeout=5)
         if response.status_code == 200:
             print_success("Backend 伺服器運行正常")
-            print_info(f"Swagger 文檔: http://localhost:8000/docs")
+            print_info(f"連線方式: {'UNIX socket ' + UDS_PATH if USE_UDS else 'TCP'}")
+            print_info(f"Swagger 文檔: {BACKEND_ORIGIN}/docs")
             return True
         else:
             print_error(f"伺服器返回狀態碼: {response.status_code}")
             return False
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print_error("無法連接到 Backend 伺服器")
+        if USE_UDS:
+            print_warning(f"UNIX socket {UDS_PATH} 存在但無法連線，可刪除後改用 TCP")
         print_warning("請確認 Backend 是否在運行: cd backend && python -m uvicorn main:app --reload")
         return False
     except Exception as e:
         print_error(f"連接錯誤: {str(e)}")
         return False
 
-def test_dashboard_summary():
-    """測試 Dashboard 摘要"""
-    print("\n" + "="*60)
-    print("測試 2: Dashboard 摘要")
-    print("="*60)
+async def fetch_dashboard_batch(client: httpx.AsyncClient):
+    """
+    以單一請求取得 Dashboard 摘要與圖表數據（/dashboard/batch）
+    
+    Returns:
+        {"summary": {...}, "chart": {...}}；請求失敗時為 None
+    """
+    payload = {
+        "queries": ["summary", "chart:24"]
+    }
+    
+    response = await client.post(
+        f"{BASE_URL}/dashboard/batch",
+        content=dumps_json(payload),
+        headers=JSON_HEADERS,
+        timeout=10
+    )
+    
+    if response.status_code != 200:
+        print_error(f"Dashboard 批次 API 返回錯誤: {response.status_code}")
+        print_error(f"回應內容: {response.text}")
+        return None
+    
+    return loads_json(response)
+
+async def test_dashboard_summary(batch: asyncio.Task):
+    """測試 Dashboard 摘要（取自共用的批次查詢結果）"""
+    print_header("測試 2: Dashboard 摘要")
     
     try:
-        response = requests.get(f"{BASE_URL}/dashboard/summary", timeout=10)
+        result = await batch
+        data = (result or {}).get('summary')
         
-        if response.status_code == 200:
-            data = response.json()
+        if data is not None:
             print_success("Dashboard API 回應成功")
             print_info(f"當前負載: {data.get('current_load_kw', 0):.2f} kW")
             print_info(f"綠電比例: {data.get('renewable_ratio_percent', 0):.2f}%")
@@ -86,54 +283,40 @@ def test_dashboard_summary():
             print_info(f"TOU 時段: {data.get('tou_period', 'N/A')}")
             return True
         else:
-            print_error(f"API 返回錯誤: {response.status_code}")
-            print_error(f"回應內容: {response.text}")
+            print_error("未取得 Dashboard 摘要")
             return False
     except Exception as e:
         print_error(f"測試失敗: {str(e)}")
         return False
 
-def test_dashboard_chart():
-    """測試 Dashboard 圖表數據"""
-    print("\n" + "="*60)
-    print("測試 3: Dashboard 圖表數據")
-    print("="*60)
-    
-    payload = {
-        "hours": 24
-    }
+async def test_dashboard_chart(batch: asyncio.Task):
+    """測試 Dashboard 圖表數據（取自共用的批次查詢結果）"""
+    print_header("測試 3: Dashboard 圖表數據")
     
     try:
-        response = requests.post(
-            f"{BASE_URL}/dashboard/chart-data",
-            json=payload,
-            timeout=10
-        )
+        result = await batch
+        data = (result or {}).get('chart')
         
-        if response.status_code == 200:
-            data = response.json()
+        if data is not None:
             print_success("圖表數據 API 回應成功")
             print_info(f"時間點數量: {len(data.get('timestamps', []))}")
             
             series = data.get('series', {})
             for key, values in series.items():
                 if values:
-                    avg = sum(values) / len(values)
+                    avg = np.asarray(values, dtype=np.float64).mean()
                     print_info(f"{key} 平均值: {avg:.2f}")
             return True
         else:
-            print_error(f"API 返回錯誤: {response.status_code}")
-            print_error(f"回應內容: {response.text}")
+            print_error("未取得圖表數據")
             return False
     except Exception as e:
         print_error(f"測試失敗: {str(e)}")
         return False
 
-def test_forecast_predict():
+async def test_forecast_predict(client: httpx.AsyncClient):
     """測試 AI 預測（異步）"""
-    print("\n" + "="*60)
-    print("測試 4: AI 負載預測")
-    print("="*60)
+    print_header("測試 4: AI 負載預測")
     
     payload = {
         "hours_ahead": 24,
@@ -144,9 +327,10 @@ def test_forecast_predict():
     try:
         # 1. 創建預測任務
         print_info("創建預測任務...")
-        response = requests.post(
+        response = await client.post(
             f"{BASE_URL}/forecast/predict",
-            json=payload,
+            content=dumps_json(payload),
+            headers=JSON_HEADERS,
             timeout=10
         )
         
@@ -155,71 +339,47 @@ def test_forecast_predict():
             print_error(f"回應內容: {response.text}")
             return False
         
-        data = response.json()
+        data = loads_json(response)
         task_id = data.get('task_id')
         print_success(f"任務已創建: {task_id}")
         
-        # 2. 輪詢任務狀態
+        # 2. 長輪詢任務狀態
         print_info("等待預測完成...")
-        max_attempts = 60  # 最多等待 60 秒
-        for attempt in range(max_attempts):
-            time.sleep(1)
+        status_data = await wait_for_task(client, FORECAST_STATUS_URL.format(task_id), max_wait=60)
+        if status_data is None:
+            return False
+        
+        if status_data.get('status') == 'completed':
+            print_success("預測完成！")
             
-            status_response = requests.get(
-                f"{BASE_URL}/forecast/predict/{task_id}",
+            result = status_data.get('result', {})
+            print_info(f"預測數量: {result.get('forecast_count', 0)} 筆")
+            print_info(f"平均負載: {result.get('avg_load_kw', 0):.2f} kW")
+            
+            # 3. 獲取最新預測結果
+            latest_response = await client.get(
+                f"{BASE_URL}/forecast/latest",
+                params={"limit": 5},
                 timeout=10
             )
             
-            if status_response.status_code != 200:
-                print_error(f"查詢狀態失敗: {status_response.status_code}")
-                return False
-            
-            status_data = status_response.json()
-            status = status_data.get('status')
-            progress = status_data.get('progress', 0)
-            
-            print(f"\r進度: {progress:.1f}% - 狀態: {status}", end='', flush=True)
-            
-            if status == 'completed':
-                print()  # 換行
-                print_success("預測完成！")
-                
-                result = status_data.get('result', {})
-                print_info(f"預測數量: {result.get('forecast_count', 0)} 筆")
-                print_info(f"平均負載: {result.get('avg_load_kw', 0):.2f} kW")
-                
-                # 3. 獲取最新預測結果
-                latest_response = requests.get(
-                    f"{BASE_URL}/forecast/latest",
-                    params={"limit": 5},
-                    timeout=10
-                )
-                
-                if latest_response.status_code == 200:
-                    latest_data = latest_response.json()
-                    print_info(f"最新預測記錄: {len(latest_data)} 筆")
-                
-                return True
+            if latest_response.status_code == 200:
+                latest_data = loads_json(latest_response)
+                print_info(f"最新預測記錄: {len(latest_data)} 筆")
             
-            elif status == 'failed':
-                print()  # 換行
-                error_msg = status_data.get('error_message', 'Unknown error')
-                print_error(f"預測失敗: {error_msg}")
-                return False
+            return True
         
-        print()  # 換行
-        print_warning("任務超時")
+        error_msg = status_data.get('error_message', 'Unknown error')
+        print_error(f"預測失敗: {error_msg}")
         return False
         
     except Exception as e:
         print_error(f"測試失敗: {str(e)}")
         return False
 
-def test_optimization():
+async def test_optimization(client: httpx.AsyncClient):
     """測試 TOU 優化（異步）"""
-    print("\n" + "="*60)
-    print("測試 5: TOU 時間電價優化")
-    print("="*60)
+    print_header("測試 5: TOU 時間電價優化")
     
     payload = {
         "hours_ahead": 24,
@@ -231,9 +391,10 @@ def test_optimization():
     try:
         # 1. 創建優化任務
         print_info("創建優化任務...")
-        response = requests.post(
+        response = await client.post(
             f"{BASE_URL}/optimization/optimize",
-            json=payload,
+            content=dumps_json(payload),
+            headers=JSON_HEADERS,
             timeout=10
         )
         
@@ -242,92 +403,68 @@ def test_optimization():
             print_error(f"回應內容: {response.text}")
             return False
         
-        data = response.json()
+        data = loads_json(response)
         task_id = data.get('task_id')
         print_success(f"任務已創建: {task_id}")
         
-        # 2. 輪詢任務狀態
+        # 2. 長輪詢任務狀態
         print_info("等待優化完成...")
-        max_attempts = 60
-        for attempt in range(max_attempts):
-            time.sleep(1)
-            
-            status_response = requests.get(
-                f"{BASE_URL}/optimization/optimize/{task_id}",
-                timeout=10
-            )
-            
-            if status_response.status_code != 200:
-                print_error(f"查詢狀態失敗: {status_response.status_code}")
-                return False
-            
-            status_data = status_response.json()
-            status = status_data.get('status')
-            progress = status_data.get('progress', 0)
+        status_data = await wait_for_task(client, OPTIMIZE_STATUS_URL.format(task_id), max_wait=60)
+        if status_data is None:
+            return False
+        
+        if status_data.get('status') == 'completed':
+            print_success("優化完成！")
             
-            print(f"\r進度: {progress:.1f}% - 狀態: {status}", end='', flush=True)
+            result = status_data.get('result', {})
+            plan_id = result.get('plan_id')
             
-            if status == 'completed':
-                print()  # 換行
-                print_success("優化完成！")
-                
-                result = status_data.get('result', {})
-                plan_id = result.get('plan_id')
-                
-                # 3. 獲取優化計劃詳情
-                if plan_id:
-                    plan_response = requests.get(
-                        f"{BASE_URL}/optimization/plan/{plan_id}",
-                        timeout=10
-                    )
-                    
-                    if plan_response.status_code == 200:
-                        plan_data = plan_response.json()
-                        print_info(f"基準成本: ${plan_data.get('baseline_cost_ntd', 0):.2f} NTD")
-                        print_info(f"優化成本: ${plan_data.get('optimized_cost_ntd', 0):.2f} NTD")
-                        print_info(f"節省金額: ${plan_data.get('savings_ntd', 0):.2f} NTD")
-                        print_info(f"節省比例: {plan_data.get('savings_percent', 0):.2f}%")
-                        print_info(f"削峰比例: {plan_data.get('peak_reduction_percent', 0):.2f}%")
+            # 3. 獲取優化計劃詳情
+            if plan_id:
+                plan_response = await client.get(
+                    f"{BASE_URL}/optimization/plan/{plan_id}",
+                    timeout=10
+                )
                 
-                return True
+                if plan_response.status_code == 200:
+                    plan_data = loads_json(plan_response)
+                    print_info(f"基準成本: ${plan_data.get('baseline_cost_ntd', 0):.2f} NTD")
+                    print_info(f"優化成本: ${plan_data.get('optimized_cost_ntd', 0):.2f} NTD")
+                    print_info(f"節省金額: ${plan_data.get('savings_ntd', 0):.2f} NTD")
+                    print_info(f"節省比例: {plan_data.get('savings_percent', 0):.2f}%")
+                    print_info(f"削峰比例: {plan_data.get('peak_reduction_percent', 0):.2f}%")
             
-            elif status == 'failed':
-                print()  # 換行
-                error_msg = status_data.get('error_message', 'Unknown error')
-                print_error(f"優化失敗: {error_msg}")
-                return False
+            return True
         
-        print()  # 換行
-        print_warning("任務超時")
+        error_msg = status_data.get('error_message', 'Unknown error')
+        print_error(f"優化失敗: {error_msg}")
         return False
         
     except Exception as e:
         print_error(f"測試失敗: {str(e)}")
         return False
 
-def test_audit_generate():
+async def test_audit_generate(client: httpx.AsyncClient):
     """測試 LLM 審計報告生成（異步）"""
-    print("\n" + "="*60)
-    print("測試 6: LLM 審計報告生成")
-    print("="*60)
+    print_header("測試 6: LLM 審計報告生成")
     
-    # 計算日期範圍（最近 7 天）
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=7)
+    # 日期範圍（最近 7 天）
+    start_date, end_date = audit_date_range(7)
     
     payload = {
         "report_type": "weekly",
-        "start_date": start_date.isoformat(),
-        "end_date": end_date.isoformat(),
+        "start_date": start_date,
+        "end_date": end_date,
         "include_recommendations": True
     }
     
     try:
         # 1. 創建報告生成任務
         print_info("創建報告生成任務...")
-        response = requests.post(
+        response = await client.post(
             f"{BASE_URL}/audit/generate",
-            json=payload,
+            content=dumps_json(payload),
+            headers=JSON_HEADERS,
             timeout=10
         )
         
@@ -336,90 +473,64 @@ def test_audit_generate():
             print_error(f"回應內容: {response.text}")
             return False
         
-        data = response.json()
+        data = loads_json(response)
         task_id = data.get('task_id')
         print_success(f"任務已創建: {task_id}")
         
-        # 2. 輪詢任務狀態（LLM 生成較慢）
+        # 2. 長輪詢任務狀態（LLM 生成較慢）
         print_info("等待 LLM 生成報告...")
-        max_attempts = 120  # 最多等待 120 秒
-        for attempt in range(max_attempts):
-            time.sleep(2)
-            
-            status_response = requests.get(
-                f"{BASE_URL}/audit/generate/{task_id}",
-                timeout=10
-            )
-            
-            if status_response.status_code != 200:
-                print_error(f"查詢狀態失敗: {status_response.status_code}")
-                return False
-            
-            status_data = status_response.json()
-            status = status_data.get('status')
-            progress = status_data.get('progress', 0)
+        status_data = await wait_for_task(client, AUDIT_STATUS_URL.format(task_id), max_wait=240)
+        if status_data is None:
+            return False
+        
+        if status_data.get('status') == 'completed':
+            print_success("報告生成完成！")
             
-            print(f"\r進度: {progress:.1f}% - 狀態: {status}", end='', flush=True)
+            result = status_data.get('result', {})
+            report_id = result.get('report_id')
             
-            if status == 'completed':
-                print()  # 換行
-                print_success("報告生成完成！")
-                
-                result = status_data.get('result', {})
-                report_id = result.get('report_id')
+            # 3. 獲取報告內容
+            if report_id:
+                report_response = await client.get(
+                    f"{BASE_URL}/audit/report/{report_id}",
+                    timeout=10
+                )
                 
-                # 3. 獲取報告內容
-                if report_id:
-                    report_response = requests.get(
-                        f"{BASE_URL}/audit/report/{report_id}",
-                        timeout=10
-                    )
+                if report_response.status_code == 200:
+                    report_data = loads_json(report_response)
+                    print_info(f"報告類型: {report_data.get('report_type', 'N/A')}")
+                    print_info(f"總用電量: {report_data.get('total_consumption_kwh', 0):.2f} kWh")
+                    print_info(f"總成本: ${report_data.get('total_cost_ntd', 0):.2f} NTD")
+                    print_info(f"綠電比例: {report_data.get('renewable_ratio_percent', 0):.2f}%")
+                    print_info(f"碳排放: {report_data.get('carbon_emission_kg', 0):.2f} kg CO2")
+                    print_info(f"LLM 模型: {report_data.get('llm_model', 'N/A')}")
                     
-                    if report_response.status_code == 200:
-                        report_data = report_response.json()
-                        print_info(f"報告類型: {report_data.get('report_type', 'N/A')}")
-                        print_info(f"總用電量: {report_data.get('total_consumption_kwh', 0):.2f} kWh")
-                        print_info(f"總成本: ${report_data.get('total_cost_ntd', 0):.2f} NTD")
-                        print_info(f"綠電比例: {report_data.get('renewable_ratio_percent', 0):.2f}%")
-                        print_info(f"碳排放: {report_data.get('carbon_emission_kg', 0):.2f} kg CO2")
-                        print_info(f"LLM 模型: {report_data.get('llm_model', 'N/A')}")
-                        
-                        content = report_data.get('content_markdown', '')
-                        if content:
-                            print_info(f"報告內容長度: {len(content)} 字元")
-                            print_info("報告預覽:")
-                            print("-" * 60)
-                            print(content[:500] + "..." if len(content) > 500 else content)
-                            print("-" * 60)
-                
-                return True
+                    content = report_data.get('content_markdown', '')
+                    if content:
+                        print_info(f"報告內容長度: {len(content)} 字元")
+                        print_info("報告預覽:")
+                        print_block(preview_text(content))
             
-            elif status == 'failed':
-                print()  # 換行
-                error_msg = status_data.get('error_message', 'Unknown error')
-                print_error(f"報告生成失敗: {error_msg}")
-                
-                # 檢查是否為 Ollama 連接問題
-                if 'ollama' in error_msg.lower() or 'connection' in error_msg.lower():
-                    print_warning("可能是 Ollama 服務未啟動")
-                    print_info("請執行: ollama serve")
-                    print_info("並確認模型已安裝: ollama list")
-                
-                return False
+            return True
+        
+        error_msg = status_data.get('error_message', 'Unknown error')
+        print_error(f"報告生成失敗: {error_msg}")
+        
+        # 檢查是否為 Ollama 連接問題
+        if 'ollama' in error_msg.lower() or 'connection' in error_msg.lower():
+            print_warning("可能是 Ollama 服務未啟動")
+            print_info("請執行: ollama serve")
+            print_info("並確認模型已安裝: ollama list")
         
-        print()  # 換行
-        print_warning("任務超時")
         return False
         
     except Exception as e:
         print_error(f"測試失敗: {str(e)}")
         return False
 
-def test_audit_query():
+async def test_audit_query(client: httpx.AsyncClient):
     """測試 Chat Assistant 互動式查詢"""
-    print("\n" + "="*60)
-    print("測試 7: Chat Assistant 互動式查詢")
-    print("="*60)
+    print_header("測試 7: Chat Assistant 互動式查詢")
     
     payload = {
         "question": "為什麼今天下午的電費比較高？"
@@ -427,19 +538,18 @@ def test_audit_query():
     
     try:
         print_info(f"提問: {payload['question']}")
-        response = requests.post(
+        response = await client.post(
             f"{BASE_URL}/audit/query",
-            json=payload,
+            content=dumps_json(payload),
+            headers=JSON_HEADERS,
             timeout=60  # LLM 回應可能較慢
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = loads_json(response)
             print_success("Chat Assistant 回應成功")
             print_info("回答:")
-            print("-" * 60)
-            print(data.get('answer', 'No answer'))
-            print("-" * 60)
+            print_block(data.get('answer', 'No answer'))
             return True
         else:
             print_error(f"API 返回錯誤: {response.status_code}")
@@ -450,7 +560,7 @@ def test_audit_query():
                 print_info("請執行: ollama serve")
             
             return False
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print_error("請求超時（LLM 回應時間過長）")
         return False
     except Exception as e:
@@ -459,27 +569,33 @@ def test_audit_query():
 
 def check_gpu_usage():
     """檢查 GPU 使用情況"""
-    print("\n" + "="*60)
-    print("測試 8: GPU 使用情況檢查")
-    print("="*60)
+    print_header("測試 8: GPU 使用情況檢查")
     
     try:
         import torch
         
         if torch.cuda.is_available():
             print_success(f"CUDA 可用: {torch.cuda.get_device_name(0)}")
-            print_info(f"GPU 數量: {torch.cuda.device_count()}")
+            device_count = torch.cuda.device_count()
+            print_info(f"GPU 數量: {device_count}")
+            
+            # 一次取得所有裝置的記憶體快照（位元組）
+            gpu_info = [
+                (
+                    i,
+                    torch.cuda.memory_allocated(i),
+                    torch.cuda.memory_reserved(i),
+                    torch.cuda.get_device_properties(i).total_memory
+                )
+                for i in range(device_count)
+            ]
             
             # 記憶體使用情況
-            for i in range(torch.cuda.device_count()):
-                allocated = torch.cuda.memory_allocated(i) / 1024**3
-                reserved = torch.cuda.memory_reserved(i) / 1024**3
-                total = torch.cuda.get_device_properties(i).total_memory / 1024**3
-                
-                print_info(f"GPU {i}: 已分配 {allocated:.2f} GB / 已保留 {reserved:.2f} GB / 總共 {total:.2f} GB")
+            for i, allocated, reserved, total in gpu_info:
+                print_info(f"GPU {i}: 已分配 {allocated / _GB:.2f} GB / 已保留 {reserved / _GB:.2f} GB / 總共 {total / _GB:.2f} GB")
                 
-                # 檢查是否接近 OOM
-                if allocated / total > 0.85:
+                # 檢查是否接近 OOM（整數比較）
+                if allocated * 100 > total * 85:
                     print_warning(f"GPU {i} 記憶體使用率超過 85%，可能面臨 OOM 風險")
             
             return True
@@ -493,40 +609,67 @@ def check_gpu_usage():
         print_error(f"GPU 檢查失敗: {str(e)}")
         return False
 
-def check_ollama_connection():
+class AsyncByteReader:
+    """將 httpx 的非同步位元組串流包裝成 ijson 所需的 async read() 介面"""
+    
+    def __init__(self, response: httpx.Response):
+        self._chunks = response.aiter_bytes()
+    
+    async def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            return b""  # ijson 以 read(0) 判斷串流型別，不可消耗資料
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+async def read_model_names(response: httpx.Response):
+    """
+    從 /api/tags 串流回應中讀取已安裝的模型名稱（小寫）
+    
+    有 ijson 時只解析 models[].name，不建立每個模型的完整 metadata；
+    否則讀完整個回應後再解析
+    """
+    if IJSON_AVAILABLE:
+        return {
+            name.lower()
+            async for name in ijson.items_async(AsyncByteReader(response), "models.item.name")
+        }
+    
+    await response.aread()
+    models = loads_json(response).get('models', [])
+    return {model.get('name', 'Unknown').lower() for model in models}
+
+async def check_ollama_connection(client: httpx.AsyncClient):
     """檢查 Ollama 連接"""
-    print("\n" + "="*60)
-    print("測試 9: Ollama LLM 連接檢查")
-    print("="*60)
+    print_header("測試 9: Ollama LLM 連接檢查")
     
     try:
-        # 嘗試連接 Ollama API
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            models = data.get('models', [])
-            
-            print_success("Ollama 服務運行正常")
-            print_info(f"已安裝模型數量: {len(models)}")
-            
-            for model in models:
-                model_name = model.get('name', 'Unknown')
-                print_info(f"  - {model_name}")
+        # 嘗試連接 Ollama API（以串流讀取模型清單）
+        async with client.stream("GET", f"{OLLAMA_ORIGIN}/api/tags", timeout=5) as response:
+            if response.status_code != 200:
+                print_error(f"Ollama API 返回錯誤: {response.status_code}")
+                return False
             
-            # 檢查是否有 llama3.2
-            has_llama = any('llama3.2' in model.get('name', '') for model in models)
-            if has_llama:
-                print_success("llama3.2 模型已安裝")
+            names = await read_model_names(response)
+        
+        print_success("Ollama 服務運行正常")
+        print_info(f"已安裝模型數量: {len(names)}")
+        
+        for name in sorted(names):
+            print_info(f"  - {name}")
+        
+        # 以模型名稱（去掉 :tag）建立集合，逐一檢查必要模型
+        base_names = frozenset(name.split(':', 1)[0] for name in names)
+        for required in REQUIRED_MODELS:
+            if required in base_names:
+                print_success(f"{required} 模型已安裝")
             else:
-                print_warning("未找到 llama3.2 模型")
-                print_info("請執行: ollama pull llama3.2")
-            
-            return True
-        else:
-            print_error(f"Ollama API 返回錯誤: {response.status_code}")
-            return False
-    except requests.exceptions.ConnectionError:
+                print_warning(f"未找到 {required} 模型")
+                print_info(f"請執行: ollama pull {required}")
+        
+        return True
+    except httpx.ConnectError:
         print_error("無法連接到 Ollama 服務")
         print_warning("請啟動 Ollama: ollama serve")
         print_info("或在新終端執行: ollama run llama3.2")
@@ -535,7 +678,7 @@ def check_ollama_connection():
         print_error(f"Ollama 檢查失敗: {str(e)}")
         return False
 
-def main():
+async def main():
     """主測試函數"""
     print("\n" + "="*60)
     print("EcoGrid Audit Predict - API 完整測試")
@@ -543,39 +686,84 @@ def main():
     print(f"測試時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"API 端點: {BASE_URL}")
     
-    results = []
+    async with create_client() as client:
+        await run_tests(client)
+
+async def warm_up_connections(client: httpx.AsyncClient, count: int = 4):
+    """
+    預先建立 keep-alive 連線
+    
+    並行發出數個輕量的 /health 請求，讓連線池在並行測試開始前就有可重用的連線，
+    後續測試不必各自進行 TCP 握手；必須在啟動並行測試之前呼叫
+    """
+    await asyncio.gather(
+        *(client.get(f"{BACKEND_ORIGIN}/health", timeout=5) for _ in range(count)),
+        return_exceptions=True  # 預熱失敗不影響測試
+    )
+
+async def gather_labeled(tests: Dict[str, Any]):
+    """
+    並行執行多個測試協程
+    
+    Args:
+        tests: {測試名稱: awaitable}
+    
+    Returns:
+        [(測試名稱, 是否通過)]，執行時拋出例外的測試視為失敗
+    """
+    outcomes = await asyncio.gather(*tests.values(), return_exceptions=True)
     
-    # 基礎檢查
-    results.append(("[1] 伺服器健康檢查", test_server_health()))
+    results = []
+    for label, outcome in zip(tests.keys(), outcomes):
+        if isinstance(outcome, Exception):
+            print_error(f"{label} 執行錯誤: {outcome}")
+            outcome = False
+        results.append((label, outcome))
+    return results
+
+async def run_tests(client: httpx.AsyncClient):
+    """執行所有測試並輸出總結（基礎檢查與後續互不相依的測試皆以協程並行）"""
+    # 基礎檢查彼此獨立，一起並行（GPU 為同步的 torch 查詢，交由執行緒處理）
+    results = await gather_labeled({
+        "[1] 伺服器健康檢查": test_server_health(client),
+        "[2] GPU 使用情況": asyncio.to_thread(check_gpu_usage),
+        "[3] Ollama 連接": check_ollama_connection(client),
+    })
+    server_ok, _, ollama_ok = (result for _, result in results)
     
-    if not results[-1][1]:
+    if not server_ok:
         print_error("\nBackend 伺服器未運行，測試中止")
         print_info("請先啟動 Backend:")
         print_info("  cd backend")
         print_info("  python -m uvicorn main:app --reload --host 0.0.0.0 --port 8000")
         return
     
-    # GPU 和 Ollama 檢查
-    results.append(("[2] GPU 使用情況", check_gpu_usage()))
-    results.append(("[3] Ollama 連接", check_ollama_connection()))
+    # 並行測試開始前先預熱連線池
+    await warm_up_connections(client)
     
-    # Dashboard API
-    results.append(("[4] Dashboard 摘要", test_dashboard_summary()))
-    results.append(("[5] Dashboard 圖表", test_dashboard_chart()))
+    # Dashboard 摘要與圖表共用同一個批次請求（一次往返）
+    dashboard_batch = asyncio.create_task(fetch_dashboard_batch(client))
     
-    # AI 預測 API
-    results.append(("[6] AI 負載預測", test_forecast_predict()))
-    
-    # TOU 優化 API
-    results.append(("[7] TOU 優化", test_optimization()))
+    # 測試幾乎都在等待 HTTP 回應，以單一事件迴圈並行並共用 client 的連線池
+    tests = {
+        "[4] Dashboard 摘要": test_dashboard_summary(dashboard_batch),
+        "[5] Dashboard 圖表": test_dashboard_chart(dashboard_batch),
+        "[6] AI 負載預測": test_forecast_predict(client),
+        "[7] TOU 優化": test_optimization(client),
+    }
     
     # LLM 審計 API（需要 Ollama）
-    if results[2][1]:  # 如果 Ollama 可用
-        results.append(("[8] LLM 報告生成", test_audit_generate()))
-        results.append(("[9] Chat Assistant", test_audit_query()))
+    if ollama_ok:
+        tests["[8] LLM 報告生成"] = test_audit_generate(client)
+        tests["[9] Chat Assistant"] = test_audit_query(client)
     else:
         print_warning("\nOllama 不可用，跳過 LLM 相關測試")
     
+    results.extend(await gather_labeled(tests))
+    
+    # 依測試編號排序輸出
+    results.sort(key=lambda item: item[0])
+    
     # 測試結果總結
     print("\n" + "="*60)
     print("測試結果總結")
@@ -585,12 +773,8 @@ def main():
     total = len(results)
     
     for test_name, result in results:
-        status = "[PASS]" if result else "[FAIL]"
-        color = Colors.GREEN if result else Colors.RED
-        try:
-            print(f"{color}{status}{Colors.RESET} - {test_name}")
-        except:
-            print(f"{status} - {test_name}")
+        status = _PASS_PREFIX if result else _FAIL_PREFIX
+        print(f"{status} - {test_name}")
     
     print("\n" + "-"*60)
     print(f"通過: {passed}/{total} ({passed/total*100:.1f}%)")
@@ -601,4 +785,4 @@ def main():
         print_warning(f"\n{total - passed} 個測試失敗")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,28 +1,171 @@
 """
 完整系統測試腳本 - 測試所有功能（AI 預測、TOU 優化、LLM 審計）
 """
+import os
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 
+import json
+import numpy as np
 import requests
 import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 
-BASE_URL = "http://localhost:8000/api/v1"
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+
+# JSON 序列化：有 orjson 時使用（較標準庫 json 快），否則退回 json.dumps
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# UNIX domain socket 傳輸為選用功能（需安裝 requests-unixsocket）
+try:
+    import requests_unixsocket
+    REQUESTS_UNIXSOCKET_AVAILABLE = True
+except ImportError:
+    REQUESTS_UNIXSOCKET_AVAILABLE = False
+
+# Backend 另以 --uds 監聽 UNIX domain socket 時，改走 socket 以略過 loopback TCP
+UDS_PATH = os.environ.get("ECOGRID_UDS", "/tmp/ecogrid.sock")
+USE_UDS = REQUESTS_UNIXSOCKET_AVAILABLE and os.path.exists(UDS_PATH)
+
+if USE_UDS:
+    BASE_URL = "http+unix://" + quote(UDS_PATH, safe="") + "/api/v1"
+else:
+    BASE_URL = "http://127.0.0.1:8000/api/v1"  # 省去 localhost 名稱解析
+
+# 任務狀態查詢 URL 模板
+FORECAST_STATUS_URL = BASE_URL + "/forecast/predict/{}"
+OPTIMIZE_STATUS_URL = BASE_URL + "/optimization/optimize/{}"
+AUDIT_STATUS_URL = BASE_URL + "/audit/generate/{}"
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def dumps_json(payload) -> bytes:
+    """將請求內容預先序列化為 JSON bytes（略過 HTTP client 內部的 json.dumps）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def loads_json(response):
+    """直接從回應的原始 bytes 解析 JSON（有 orjson 時使用，略過編碼偵測）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+@lru_cache(maxsize=1)
+def audit_date_range(days: int = 7):
+    """審計報告的日期範圍（最近 N 天，YYYY-MM-DD；同一次執行只計算一次）"""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+
+# 所有測試共用的 HTTP Session（連線池 + keep-alive，輪詢時不必每次重新建立連線）
+SESSION = requests.Session()
+SESSION.trust_env = False  # 只連本機服務，不需每次請求都讀取 proxy 環境變數
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+if USE_UDS:
+    SESSION.mount("http+unix://", requests_unixsocket.UnixAdapter())
+SESSION.headers.update({"Accept": "application/json", "Connection": "keep-alive"})
+
+# 長輪詢：每次請求由伺服器最多保留的秒數
+LONG_POLL_WAIT = 30
+
+# 進度列格式：\r 回到行首，\x1b[K 清除行尾殘字
+PROGRESS_FMT = "\r  進度: {:5.1f}% - {}\x1b[K"
 
 def print_section(title):
     print(f"\n{'='*60}")
     print(f"  {title}")
     print(f"{'='*60}\n")
 
+def preview_text(text: str, limit: int = 500) -> str:
+    """截取前 limit 個字元作為預覽（超過時加上 ...）"""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def wait_for_task(status_url, max_wait):
+    """
+    以長輪詢等待背景任務結束（伺服器在任務完成/失敗時立即回應，不需 sleep）
+    
+    Returns:
+        最後一次查詢到的任務狀態（逾時時可能仍未結束）
+    """
+    deadline = time.monotonic() + max_wait
+    status = {}
+    last_progress, last_status = -1, None
+    headers = {}
+    
+    while True:
+        # 每輪只讀取一次單調時鐘
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        
+        wait = min(LONG_POLL_WAIT, remaining)
+        try:
+            status_response = SESSION.get(status_url, params={"wait": wait}, headers=headers, timeout=wait + 5)
+        except requests.exceptions.ReadTimeout:
+            continue  # 連線被中斷，重新發出長輪詢
+        except requests.exceptions.ConnectionError as e:
+            # Session 掛載了 Retry：讀取逾時重試用盡後會包成 MaxRetryError 以 ConnectionError 拋出，
+            # 只有這種情況重新發出長輪詢；連線被拒等其他錯誤表示 Backend 不可用，立即結束
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            if isinstance(reason, ReadTimeoutError):
+                continue
+            error = f"Connection failed: {e}"
+            status = {"status": "failed", "error": error, "error_message": error}
+            break
+        if status_response.status_code == 304:
+            continue  # 狀態未變（ETag 相同），不需解析 JSON
+        if status_response.status_code != 200:
+            # 任務不存在 (404) 等錯誤：視為失敗結束，不解析回應內容
+            error = f"HTTP {status_response.status_code}"
+            status = {"status": "failed", "error": error, "error_message": error}
+            break
+        
+        etag = status_response.headers.get("ETag")
+        if etag:
+            headers = {"If-None-Match": etag}
+        status = loads_json(status_response)
+        
+        progress = status.get('progress', 0)
+        
+        # 只在進度整數或狀態變化時才更新進度列
+        if (int(progress), status['status']) != (last_progress, last_status):
+            last_progress, last_status = int(progress), status['status']
+            sys.stdout.flush()  # 先清空文字層緩衝，確保輸出順序
+            sys.stdout.buffer.write(PROGRESS_FMT.format(progress, status['status']).encode('utf-8'))
+            sys.stdout.buffer.flush()
+        
+        if status["status"] in ("completed", "failed"):
+            break
+    
+    print()  # 結束進度列
+    
+    return status
+
 def test_dashboard():
     """測試儀表板 API"""
     print_section("1. 測試儀表板功能")
     
-    # 取得摘要數據
-    response = requests.get(f"{BASE_URL}/dashboard/summary")
+    # 以單一批次請求取得摘要與圖表數據
+    payload = {
+        "queries": ["summary", "chart:24"]
+    }
+    response = SESSION.post(f"{BASE_URL}/dashboard/batch", data=dumps_json(payload), headers=JSON_HEADERS)
     if response.status_code == 200:
-        data = response.json()
+        batch = loads_json(response)
+        data = batch["summary"]
         print(f"✓ 當前負載: {data['current_load_kw']:.2f} kW")
         print(f"✓ 今日總用量: {data['total_consumption_today']:.2f} kWh")
         print(f"✓ 太陽能發電: {data['current_solar_kw']:.2f} kW")
@@ -30,6 +173,7 @@ def test_dashboard():
         print(f"✓ 電池狀態: {data['battery_soc']*100:.1f}%")
         print(f"✓ TOU 時段: {data['tou_period']}")
         print(f"✓ 當前費率: ${data['current_tariff']:.2f} NTD/kWh")
+        print(f"✓ 圖表數據點（24 小時）: {len(batch['chart']['timestamps'])}")
     else:
         print(f"✗ 儀表板 API 失敗: {response.status_code}")
         return False
@@ -48,49 +192,45 @@ def test_ai_prediction():
     }
     
     print("發起預測任務（使用 720 小時台灣真實用電數據）...")
-    response = requests.post(f"{BASE_URL}/forecast/predict", json=payload)
+    response = SESSION.post(f"{BASE_URL}/forecast/predict", data=dumps_json(payload), headers=JSON_HEADERS)
     
     if response.status_code != 200:
         print(f"✗ 預測 API 失敗: {response.status_code}")
         return False
     
-    task = response.json()
+    task = loads_json(response)
     task_id = task["task_id"]
     print(f"✓ 任務 ID: {task_id}")
     
-    # 輪詢任務狀態
+    # 長輪詢任務狀態
     max_wait = 600  # 最多等待 10 分鐘
-    start_time = time.time()
+    start_time = time.monotonic()
     
-    while time.time() - start_time < max_wait:
-        status_response = requests.get(f"{BASE_URL}/forecast/predict/{task_id}")
-        status = status_response.json()
-        
-        print(f"  進度: {status['progress']}% - {status['status']}")
-        
-        if status["status"] == "completed":
-            print(f"✓ 預測完成！耗時: {time.time() - start_time:.1f} 秒")
-            break
-        elif status["status"] == "failed":
-            print(f"✗ 預測失敗: {status.get('error', 'Unknown error')}")
-            return False
-        
-        time.sleep(5)
+    status = wait_for_task(FORECAST_STATUS_URL.format(task_id), max_wait)
+    if status.get("status") == "completed":
+        print(f"✓ 預測完成！耗時: {time.monotonic() - start_time:.1f} 秒")
+    elif status.get("status") == "failed":
+        print(f"✗ 預測失敗: {status.get('error', 'Unknown error')}")
+        return False
     
     # 取得最新預測結果
-    results_response = requests.get(f"{BASE_URL}/forecast/latest")
+    results_response = SESSION.get(f"{BASE_URL}/forecast/latest")
     if results_response.status_code == 200:
-        results = results_response.json()
+        results = loads_json(results_response)
         forecast_data = results["forecast_data"]
-        predictions = [item["predicted_load_kw"] for item in forecast_data]
+        predictions = np.fromiter(
+            (item["predicted_load_kw"] for item in forecast_data),
+            dtype=np.float64,
+            count=len(forecast_data)
+        )
+        avg_load, min_load, max_load = predictions.mean(), predictions.min(), predictions.max()
         
         print(f"\n預測結果統計（24 小時）:")
-        print(f"  平均負載: {sum(predictions)/len(predictions):.2f} kW")
-        print(f"  最小負載: {min(predictions):.2f} kW")
-        print(f"  最大負載: {max(predictions):.2f} kW")
+        print(f"  平均負載: {avg_load:.2f} kW")
+        print(f"  最小負載: {min_load:.2f} kW")
+        print(f"  最大負載: {max_load:.2f} kW")
         
         # 驗證預測值是否合理（200-600 kW 範圍）
-        avg_load = sum(predictions) / len(predictions)
         if 200 <= avg_load <= 600:
             print("✓ 預測值在合理範圍內（200-600 kW）")
             return True
@@ -119,39 +259,31 @@ def test_tou_optimization():
     }
     
     print("發起 TOU 優化任務...")
-    response = requests.post(f"{BASE_URL}/optimization/optimize", json=payload)
+    response = SESSION.post(f"{BASE_URL}/optimization/optimize", data=dumps_json(payload), headers=JSON_HEADERS)
     
     if response.status_code != 200:
         print(f"✗ 優化 API 失敗: {response.status_code}")
         return False
     
-    task = response.json()
+    task = loads_json(response)
     task_id = task["task_id"]
     print(f"✓ 任務 ID: {task_id}")
     
-    # 輪詢任務狀態
+    # 長輪詢任務狀態
     max_wait = 120
-    start_time = time.time()
+    start_time = time.monotonic()
     
-    while time.time() - start_time < max_wait:
-        status_response = requests.get(f"{BASE_URL}/optimization/optimize/{task_id}")
-        status = status_response.json()
-        
-        print(f"  進度: {status['progress']}% - {status['status']}")
-        
-        if status["status"] == "completed":
-            print(f"✓ 優化完成！耗時: {time.time() - start_time:.1f} 秒")
-            break
-        elif status["status"] == "failed":
-            print(f"✗ 優化失敗: {status.get('error', 'Unknown error')}")
-            return False
-        
-        time.sleep(2)
+    status = wait_for_task(OPTIMIZE_STATUS_URL.format(task_id), max_wait)
+    if status.get("status") == "completed":
+        print(f"✓ 優化完成！耗時: {time.monotonic() - start_time:.1f} 秒")
+    elif status.get("status") == "failed":
+        print(f"✗ 優化失敗: {status.get('error', 'Unknown error')}")
+        return False
     
     # 取得優化結果
-    plan_response = requests.get(f"{BASE_URL}/optimization/latest")
+    plan_response = SESSION.get(f"{BASE_URL}/optimization/latest")
     if plan_response.status_code == 200:
-        plan = plan_response.json()
+        plan = loads_json(plan_response)
         print(f"\n優化結果:")
         print(f"  原始成本: ${plan['baseline_cost_ntd']:.2f} NTD")
         print(f"  優化成本: ${plan['optimized_cost_ntd']:.2f} NTD")
@@ -166,49 +298,52 @@ def test_llm_audit():
     """測試 LLM 審計報告生成"""
     print_section("4. 測試 LLM 審計報告生成")
     
-    # 計算過去 7 天的日期範圍
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=7)
+    # 過去 7 天的日期範圍
+    start_date, end_date = audit_date_range(7)
     
     payload = {
-        "start_date": start_date.strftime("%Y-%m-%d"),
-        "end_date": end_date.strftime("%Y-%m-%d")
+        "start_date": start_date,
+        "end_date": end_date
     }
     
     print(f"發起審計報告生成任務（{payload['start_date']} ~ {payload['end_date']}）...")
-    response = requests.post(f"{BASE_URL}/audit/generate", json=payload)
+    response = SESSION.post(f"{BASE_URL}/audit/generate", data=dumps_json(payload), headers=JSON_HEADERS)
     
     if response.status_code != 200:
         print(f"✗ 審計 API 失敗: {response.status_code}")
         return False
     
-    task = response.json()
+    task = loads_json(response)
     task_id = task["task_id"]
     print(f"✓ 任務 ID: {task_id}")
     
-    # 輪詢任務狀態
+    # 長輪詢任務狀態
     max_wait = 120
-    start_time = time.time()
+    start_time = time.monotonic()
     
-    while time.time() - start_time < max_wait:
-        # 改為查詢任務狀態 API（假設存在）
-        # 如果沒有任務狀態 API，直接等待並查詢最新報告
-        time.sleep(5)
-        
-        # 嘗試取得最新報告
-        report_response = requests.get(f"{BASE_URL}/audit/latest")
-        if report_response.status_code == 200:
-            report = report_response.json()
-            # 檢查報告 ID 是否匹配任務建立後的新報告
-            print(f"✓ 審計報告生成完成！耗時: {time.time() - start_time:.1f} 秒")
-            print(f"\n審計報告預覽（前 500 字符）:")
-            content = report.get('content_markdown', report.get('report', ''))
-            print(content[:500])
-            print(f"\n✓ 報告總長度: {len(content)} 字符")
-            return True
+    status = wait_for_task(AUDIT_STATUS_URL.format(task_id), max_wait)
+    if status.get("status") == "failed":
+        print(f"✗ 審計報告生成失敗: {status.get('error_message', 'Unknown error')}")
+        return False
+    if status.get("status") != "completed":
+        print(f"✗ 審計報告生成超時")
+        return False
     
-    print(f"✗ 審計報告生成超時")
-    return False
+    # 取得任務產生的報告
+    report_id = (status.get("result") or {}).get("report_id")
+    report_url = f"{BASE_URL}/audit/report/{report_id}" if report_id else f"{BASE_URL}/audit/latest"
+    report_response = SESSION.get(report_url)
+    if report_response.status_code != 200:
+        print(f"✗ 無法取得審計報告: {report_response.status_code}")
+        return False
+    
+    report = loads_json(report_response)
+    print(f"✓ 審計報告生成完成！耗時: {time.monotonic() - start_time:.1f} 秒")
+    print(f"\n審計報告預覽（前 500 字符）:")
+    content = report.get('content_markdown', report.get('report', ''))
+    print(preview_text(content))
+    print(f"\n✓ 報告總長度: {len(content)} 字符")
+    return True
 
 def main():
     print_section("EcoGrid 完整系統測試")
@@ -233,6 +368,8 @@ def main():
         print(f"\n✗ 測試過程發生錯誤: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        SESSION.close()
     
     # 輸出測試摘要
     print_section("測試結果摘要")